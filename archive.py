@@ -0,0 +1,335 @@
+import os
+import json
+import fcntl
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Append-only columnar archive of channel history for long-range analytics.
+# One directory per channel and month; each column is a raw little-endian array
+# read back with numpy.memmap, so year-long scans touch only the columns they use:
+#   data/archive/<channel>/<YYYY-MM>/<column>.bin   rows committed in meta.json
+#   data/archive/<channel>/users.json               user ID -> index
+#   data/archive/<channel>/categories.json          category name -> code (append-only)
+#   data/archive/<channel>/cursor.json              history archived up to this ts
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", os.path.join(DATA_DIR, "archive"))
+ARCHIVE_BACKFILL_DAYS = int(os.environ.get("ARCHIVE_BACKFILL_DAYS", "365"))
+
+COLUMNS = {
+    "ts": "<f8",
+    "thread_ts": "<f8",       # 0 for messages outside a thread
+    "user": "<i4",            # index into users.json, -1 for none
+    "category": "<i2",        # code from categories.json for tickets, -1 otherwise
+    "escalations": "<u1",     # escalation signals on the message: 👎 reactions, escalation text, persisted state
+    "followup": "<u1",        # human reply inside a thread
+    "bot": "<u1",
+}
+
+_lock = threading.Lock()
+
+def _numpy():
+    """Import numpy on first use; the archive is optional and the bot runs without it"""
+    import numpy
+    return numpy
+
+def available():
+    """Whether numpy is installed so the archive can be used"""
+    try:
+        _numpy()
+        return True
+    except ImportError:
+        return False
+
+def _channel_dir(channel_id):
+    return os.path.join(ARCHIVE_DIR, channel_id)
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+def _write_json(path, data):
+    """Write a small metadata file atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _months(start_ts, end_ts):
+    """YYYY-MM partition names overlapping a timestamp range"""
+    month = datetime.fromtimestamp(start_ts).replace(day=1).date()
+    last = datetime.fromtimestamp(end_ts).date()
+    months = []
+    while month <= last:
+        months.append(month.strftime("%Y-%m"))
+        month = (month + timedelta(days=32)).replace(day=1)
+    return months
+
+def _row(message, users, categories, categorize, escalated):
+    """Reduce one history message to archive columns, mirroring aggregate_messages"""
+    ts = float(message.get("ts", 0))
+    thread_ts = float(message.get("thread_ts") or 0)
+    is_bot = bool(message.get("bot_id"))
+    top_level = not thread_ts or thread_ts == ts
+    text = message.get("text", "")
+
+    category = -1
+    if not is_bot and top_level:
+        category = categories.setdefault(categorize(text), len(categories))
+
+    escalations = sum(1 for r in message.get("reactions", []) if r.get("name") in ["thumbsdown", "-1"])
+    lowered = text.lower()
+    if "issue needs escalation" in lowered or "🔴" in lowered:
+        escalations += 1
+    if category >= 0 and message.get("ts") in escalated:
+        escalations += 1
+
+    user = message.get("user")
+    return (
+        ts,
+        thread_ts,
+        users.setdefault(user, len(users)) if user else -1,
+        category,
+        min(escalations, 255),
+        int(not is_bot and not top_level),
+        int(is_bot),
+    )
+
+@contextmanager
+def _writer(channel_id, blocking=True):
+    """Hold the channel's writer lock across threads and processes; yields False if busy and not blocking"""
+    channel_dir = _channel_dir(channel_id)
+    os.makedirs(channel_dir, exist_ok=True)
+    if not _lock.acquire(blocking):
+        yield False
+        return
+    try:
+        with open(os.path.join(channel_dir, ".lock"), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+            except BlockingIOError:
+                acquired = False
+            yield acquired
+    finally:
+        _lock.release()
+
+def _append(channel_id, messages, escalated):
+    """Write rows to their month partitions (caller holds the writer lock)"""
+    import metrics
+
+    np = _numpy()
+    if not messages:
+        return 0
+
+    channel_dir = _channel_dir(channel_id)
+    users = _read_json(os.path.join(channel_dir, "users.json"), {})
+    categories = _read_json(os.path.join(channel_dir, "categories.json"), {})
+
+    by_month = {}
+    for message in sorted(messages, key=lambda m: float(m.get("ts", 0))):
+        month = datetime.fromtimestamp(float(message.get("ts", 0))).strftime("%Y-%m")
+        by_month.setdefault(month, []).append(_row(message, users, categories, metrics.categorize_issue, escalated))
+
+    # Lookups first, so every committed code has a name
+    _write_json(os.path.join(channel_dir, "users.json"), users)
+    _write_json(os.path.join(channel_dir, "categories.json"), categories)
+
+    for month, rows in by_month.items():
+        partition = os.path.join(channel_dir, month)
+        os.makedirs(partition, exist_ok=True)
+        meta_path = os.path.join(partition, "meta.json")
+        committed = _read_json(meta_path, {"rows": 0})["rows"]
+        values = list(zip(*rows))
+        for (name, dtype), column in zip(COLUMNS.items(), values):
+            path = os.path.join(partition, f"{name}.bin")
+            with open(path, "ab") as f:
+                # Drop bytes from an append that died before meta.json was updated
+                f.truncate(committed * np.dtype(dtype).itemsize)
+                f.write(np.asarray(column, dtype=dtype).tobytes())
+        _write_json(meta_path, {"rows": committed + len(rows)})
+    return sum(len(rows) for rows in by_month.values())
+
+def append(channel_id, messages, escalated=()):
+    """Append messages to their month partitions; returns the number of rows written
+
+    Messages must be newer than anything already archived for the channel (sync
+    guarantees this), so each partition stays sorted by ts.
+    """
+    with _writer(channel_id):
+        return _append(channel_id, messages, escalated)
+
+def _start_of_today(now=None):
+    return datetime.combine((now or datetime.now()).date(), datetime.min.time()).timestamp()
+
+def archived_until(channel_id):
+    """Timestamp the channel is archived up to, or None before the first sync finishes"""
+    return _read_json(os.path.join(_channel_dir(channel_id), "cursor.json"), {}).get("archived_until")
+
+def sync(client, channel_id, now=None):
+    """Archive finished days of history since the cursor (first run backfills ARCHIVE_BACKFILL_DAYS)
+
+    The cursor read, history fetch, append and cursor write all happen under the channel's
+    writer lock; if another thread or process is already syncing, this returns 0 at once.
+    """
+    import escalations
+    import metrics
+
+    start_of_today = _start_of_today(now)
+    with _writer(channel_id, blocking=False) as acquired:
+        if not acquired:
+            logger.info(f"Archive sync for {channel_id} already running elsewhere")
+            return 0
+        oldest = archived_until(channel_id) or start_of_today - ARCHIVE_BACKFILL_DAYS * 86400
+        if oldest >= start_of_today:
+            return 0
+
+        # Today stays out of the archive so appended rows are final
+        messages = metrics.fetch_history(client, channel_id, oldest, start_of_today)
+        written = _append(channel_id, messages, escalations.escalated_threads())
+        _write_json(os.path.join(_channel_dir(channel_id), "cursor.json"), {"archived_until": start_of_today})
+    logger.info(f"Archived {written} message(s) for {channel_id}")
+    return written
+
+def sync_in_background(client, channel_id):
+    """Start a sync off the request path when finished days are missing from the archive"""
+    if (archived_until(channel_id) or 0) >= _start_of_today():
+        return
+
+    def run():
+        try:
+            tracing.traced("archive_sync")(sync)(client=client, channel_id=channel_id)
+        except Exception as e:
+            logger.error(f"Error syncing history archive: {str(e)}")
+
+    threading.Thread(target=run, name="archive-sync", daemon=True).start()
+
+def _partitions(channel_id, start_ts, end_ts, columns):
+    """Yield {column: memmapped slice} for each month partition, trimmed to [start_ts, end_ts]"""
+    np = _numpy()
+    for month in _months(start_ts, end_ts):
+        partition = os.path.join(_channel_dir(channel_id), month)
+        rows = _read_json(os.path.join(partition, "meta.json"), {"rows": 0})["rows"]
+        if not rows:
+            continue
+        ts = np.memmap(os.path.join(partition, "ts.bin"), dtype=COLUMNS["ts"], mode="r", shape=(rows,))
+        lo = int(np.searchsorted(ts, start_ts, side="left"))
+        hi = int(np.searchsorted(ts, end_ts, side="right"))
+        if lo >= hi:
+            continue
+        data = {"ts": ts[lo:hi]}
+        for name in columns:
+            if name != "ts":
+                column = np.memmap(os.path.join(partition, f"{name}.bin"), dtype=COLUMNS[name], mode="r", shape=(rows,))
+                data[name] = column[lo:hi]
+        yield month, data
+
+def _escalated_threads(cols, np):
+    """Thread timestamps with any escalation signal - reports count escalations once per thread"""
+    thread_of = np.where(cols["thread_ts"] > 0, cols["thread_ts"], cols["ts"])
+    return thread_of[cols["escalations"] > 0]
+
+def _category_names(channel_id):
+    categories = _read_json(os.path.join(_channel_dir(channel_id), "categories.json"), {})
+    names = [None] * len(categories)
+    for name, code in categories.items():
+        names[code] = name
+    return names
+
+def aggregate(channel_id, start_ts, end_ts):
+    """Vectorized equivalent of metrics.aggregate_messages over an archived time range"""
+    np = _numpy()
+    names = _category_names(channel_id)
+    totals = {"total_tickets": 0, "bot_responses": 0, "escalations": 0}
+    category_counts = np.zeros(len(names), dtype=np.int64)
+    ticket_ts, followup_threads, escalated = [], [], []
+
+    for _, cols in _partitions(channel_id, start_ts, end_ts, ["thread_ts", "category", "escalations", "followup", "bot"]):
+        tickets = cols["category"] >= 0
+        totals["total_tickets"] += int(tickets.sum())
+        totals["bot_responses"] += int(cols["bot"].sum())
+        escalated.append(_escalated_threads(cols, np))
+        category_counts += np.bincount(cols["category"][tickets], minlength=len(names))
+        ticket_ts.append(cols["ts"][tickets])
+        followup_threads.append(cols["thread_ts"][cols["followup"] == 1])
+
+    with_followup = 0
+    if ticket_ts:
+        threads = np.unique(np.concatenate(followup_threads))
+        with_followup = int(np.isin(threads, np.concatenate(ticket_ts)).sum())
+        totals["escalations"] = int(np.unique(np.concatenate(escalated)).size)
+
+    return dict(
+        totals,
+        tickets_with_followup=with_followup,
+        categories={names[code]: int(count) for code, count in enumerate(category_counts) if count},
+    )
+
+def monthly_trend(channel_id, start_ts, end_ts, category=None):
+    """Per-month ticket, escalation and category counts; optionally for one category only"""
+    np = _numpy()
+    names = _category_names(channel_id)
+    code = names.index(category) if category in names else None
+    if category is not None and code is None:
+        return {}
+
+    trend = {}
+    for month, cols in _partitions(channel_id, start_ts, end_ts, ["category", "escalations", "thread_ts"]):
+        tickets = cols["category"] >= 0 if code is None else cols["category"] == code
+        counts = np.bincount(cols["category"][cols["category"] >= 0], minlength=len(names))
+        escalated = np.unique(_escalated_threads(cols, np))
+        if code is not None:
+            # Only escalations of the category's tickets
+            escalated = escalated[np.isin(escalated, cols["ts"][tickets])]
+        escalations = int(escalated.size)
+        trend[month] = {
+            "tickets": int(tickets.sum()),
+            "escalations": escalations,
+            "categories": {names[c]: int(n) for c, n in enumerate(counts) if n},
+        }
+    return trend
+
+def year_trend(channel_id, category=None, months=12, now=None):
+    """monthly_trend over the last N months, oldest first"""
+    end = now or datetime.now()
+    year, month = end.year, end.month - (months - 1)
+    while month <= 0:
+        year, month = year - 1, month + 12
+    start = datetime(year, month, 1)
+    return monthly_trend(channel_id, start.timestamp(), end.timestamp(), category=category)
+
+def summarize_trend(trend):
+    """Totals and the most common category across a trend"""
+    categories = Counter()
+    for data in trend.values():
+        categories.update(data["categories"])
+    return {
+        "tickets": sum(data["tickets"] for data in trend.values()),
+        "escalations": sum(data["escalations"] for data in trend.values()),
+        "top_categories": categories.most_common(3),
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the columnar channel archive")
+    parser.add_argument("channel_id")
+    parser.add_argument("--category", help="only count tickets in this category, e.g. Network/VPN")
+    parser.add_argument("--months", type=int, default=12)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = year_trend(args.channel_id, category=args.category, months=args.months)
+    print(json.dumps(result, indent=2))
+    print(f"Scanned in {(time.perf_counter() - started) * 1000:.1f} ms")
@@ -0,0 +1,143 @@
+import os
+import logging
+import re
+import threading
+import time
+
+import state
+
+logger = logging.getLogger(__name__)
+
+MAX_THREADS = int(os.environ.get("ASSIGNEE_REGISTRY_SIZE", "5000"))
+
+# "Assignee: <@U123>", "*Assignee*\n<@U123|name>" and similar Assist layouts
+_ASSIGNEE_MENTION_RE = re.compile(r"assignee\W{0,4}\s*<@(\w+)(?:\|[^>]*)?>", re.IGNORECASE)
+_ANY_MENTION_RE = re.compile(r"<@(\w+)(?:\|[^>]*)?>")
+_ASSIGNEE_NAME_RE = re.compile(r"Assignee:\s*(\S+\s+\S+)")
+
+# Registry state lives in the shared state store so every worker process sees it:
+#   assignee:       thread_ts -> {"user_id": ..., "mention": ...}
+#   assist_seen:    thread_ts -> True once any bot (Assist) has posted in it
+#   message_thread: reply ts -> thread_ts, for reactions on replies
+POLL_INTERVAL = 0.25
+
+_lock = threading.Condition()
+
+def _store():
+    """The shared state store holding the registry"""
+    return state.get_store()
+
+def parse_assignee(text):
+    """Extract the assignee from an Assist bot message, or None"""
+    if not text or "assignee" not in text.lower():
+        return None
+
+    match = _ASSIGNEE_MENTION_RE.search(text) or _ANY_MENTION_RE.search(text)
+    if match:
+        user_id = match.group(1)
+        return {"user_id": user_id, "mention": f"<@{user_id}>"}
+
+    # No user mention - fall back to the plain name after "Assignee:"
+    name_match = _ASSIGNEE_NAME_RE.search(text)
+    if name_match:
+        return {"user_id": None, "mention": name_match.group(1).strip()}
+    return None
+
+def observe(message):
+    """Record a message as it arrives; bot messages mark the thread and may name the assignee"""
+    if message.get("subtype") == "message_changed":
+        message = message.get("message", {})
+
+    ts = message.get("ts")
+    thread_ts = message.get("thread_ts") or ts
+    if not thread_ts:
+        return None
+
+    is_bot = bool(message.get("bot_id") or message.get("app_id"))
+    assignee = parse_assignee(message.get("text", ""))
+
+    if not is_bot and not assignee:
+        return None
+
+    store = _store()
+    if is_bot:
+        store.set("assist_seen", thread_ts, True, max_entries=MAX_THREADS)
+        if ts:
+            store.set("message_thread", ts, thread_ts, max_entries=MAX_THREADS)
+    if assignee:
+        # A name-only match never overwrites a proper user mention
+        if assignee["user_id"]:
+            store.set("assignee", thread_ts, assignee, max_entries=MAX_THREADS)
+        else:
+            store.add("assignee", thread_ts, assignee, max_entries=MAX_THREADS)
+    with _lock:
+        _lock.notify_all()
+    return assignee
+
+def observe_all(messages):
+    """Seed the registry from an already-fetched thread"""
+    for message in messages:
+        observe(message)
+
+def get(thread_ts):
+    """Return the known assignee for a thread, or None"""
+    return _store().get("assignee", thread_ts)
+
+def get_mention(thread_ts):
+    """Return the assignee mention for a thread, or None"""
+    assignee = get(thread_ts)
+    return assignee["mention"] if assignee else None
+
+def record_reply(message_ts, thread_ts):
+    """Remember the thread of a message we posted; Slack doesn't send us our own message events"""
+    if message_ts and thread_ts and message_ts != thread_ts:
+        _store().set("message_thread", message_ts, thread_ts, max_entries=MAX_THREADS)
+
+def thread_for(message_ts):
+    """Map a reply ts back to its thread; top-level and unknown messages map to themselves"""
+    return _store().get("message_thread", message_ts, message_ts)
+
+def _wait_until(check, timeout):
+    """Wait for check() to return a truthy value; polls when other processes share the state"""
+    deadline = time.monotonic() + timeout
+    poll = POLL_INTERVAL if _store().shared else None
+    with _lock:
+        while True:
+            result = check()
+            if result:
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            _lock.wait(min(remaining, poll) if poll else remaining)
+
+def wait_for_assist(thread_ts, timeout):
+    """Block until a bot message is seen in the thread; returns False on timeout"""
+    return bool(_wait_until(lambda: _store().get("assist_seen", thread_ts), timeout))
+
+def wait_for_assignee(thread_ts, timeout):
+    """Block until the thread's assignee is known; returns the mention or None"""
+    assignee = _wait_until(lambda: get(thread_ts), timeout)
+    return assignee["mention"] if assignee else None
+
+def resolve(client, channel_id, message_ts):
+    """Return the assignee for a message's thread, fetching the thread once only on a cold registry
+
+    message_ts may be a reply; the assignee is always looked up under the parent thread ts.
+    """
+    thread_ts = thread_for(message_ts)
+    assignee = get(thread_ts)
+    if assignee is None:
+        try:
+            replies = client.conversations_replies(channel=channel_id, ts=message_ts, limit=20)
+            messages = replies.get("messages", [])
+            observe_all(messages)
+            if messages:
+                # The parent comes first and carries the thread ts
+                thread_ts = messages[0].get("thread_ts") or messages[0].get("ts")
+                if thread_ts != message_ts:
+                    _store().set("message_thread", message_ts, thread_ts, max_entries=MAX_THREADS)
+            assignee = get(thread_ts)
+        except Exception as e:
+            logger.error(f"Error fetching thread for assignee lookup: {str(e)}")
+    return assignee
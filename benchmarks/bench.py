@@ -0,0 +1,284 @@
+"""Micro-benchmarks for the pure-Python hot paths
+
+    python benchmarks/bench.py run [--sizes 1000,10000] [--only categorize_issue] [--output results.json]
+    python benchmarks/bench.py run --save-baseline
+    python benchmarks/bench.py compare [--current results.json] [--threshold 0.15]
+
+Each benchmark runs over synthetic corpora of 1k, 10k and 100k messages and
+reports throughput (best of --repeat timed samples) and peak traced memory (one run under
+tracemalloc). compare exits non-zero when any result is slower or uses more
+memory than the stored baseline by more than the threshold.
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep benchmark runs away from real state and data files
+os.environ.setdefault("STATE_BACKEND", "memory")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="it-bot-bench-"))
+# Lift the knowledge record cap above the largest corpus so find_relevant sees every record
+os.environ.setdefault("KNOWLEDGE_MAX_RECORDS", "1000000")
+
+import corpus  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_THRESHOLD = 0.15
+MIN_SAMPLE_SECONDS = 0.2
+
+QUERIES = [
+    "I can't log in to Okta, my password expired",
+    "Need access to Figma for a project",
+    "VPN disconnects during Zoom calls",
+    "printer on my floor is not working",
+]
+
+class FakeSlackClient:
+    """Serves a synthetic channel from memory; history ignores limit so the scan covers the corpus"""
+
+    def __init__(self, messages):
+        self.top_level = [m for m in messages if not m.get("thread_ts") or m["thread_ts"] == m["ts"]]
+        self.threads = {}
+        for message in messages:
+            thread_ts = message.get("thread_ts")
+            if thread_ts:
+                self.threads.setdefault(thread_ts, []).append(message)
+        self.parents = {m["ts"]: m for m in self.top_level}
+        for message in self.top_level:
+            replies = self.threads.get(message["ts"], [])
+            if replies:
+                message["thread_ts"] = message["ts"]
+                message["reply_count"] = len(replies)
+
+    def conversations_history(self, channel, limit=100, **kwargs):
+        return {"messages": self.top_level}
+
+    def conversations_replies(self, channel, ts, limit=100, **kwargs):
+        parent = self.parents.get(ts)
+        return {"messages": ([parent] if parent else []) + self.threads.get(ts, [])[:limit - 1]}
+
+# Each setup takes a corpus size and returns (callable, operations per call, unit)
+
+def setup_categorize_issue(size):
+    import metrics
+    texts = [m.get("text", "") for m in corpus.generate_messages(size)]
+
+    def run():
+        for text in texts:
+            metrics.categorize_issue(text)
+    return run, len(texts), "messages"
+
+def setup_completion_checks(size):
+    import router
+    texts = [m.get("text", "") for m in corpus.generate_messages(size)]
+
+    def run():
+        for text in texts:
+            router.is_simple_completion(text)
+            router.is_access_request(text)
+            router.is_change_request(text)
+    return run, len(texts), "messages"
+
+def setup_similar_past_tickets(size):
+    import bot
+    client = FakeSlackClient(corpus.generate_messages(size))
+    scanned = len(client.top_level) * len(QUERIES)
+
+    def run():
+        for query in QUERIES:
+            # A limit no scan can reach keeps the work proportional to the corpus
+            bot.get_similar_past_tickets(client, "C0IT", query, limit=size)
+    return run, scanned, "messages"
+
+def setup_knowledge_find_relevant(size):
+    import knowledge
+    import state
+    store = state.get_store()
+    for thread_ts, _ in store.items("resolution"):
+        store.delete("resolution", thread_ts)
+    for thread_ts, record in corpus.generate_resolutions(size).items():
+        store.set("resolution", thread_ts, record)
+
+    def run():
+        for query in QUERIES:
+            knowledge.find_relevant(query)
+    return run, size * len(QUERIES), "records"
+
+def setup_aggregate_messages(size):
+    import metrics
+    messages = corpus.generate_messages(size)
+
+    def run():
+        metrics.aggregate_messages(messages)
+    return run, len(messages), "messages"
+
+def setup_weekly_report(size):
+    import metrics
+    import usage
+    messages = corpus.generate_messages(size)
+    entries = corpus.generate_usage_entries(size)
+    aggregate = metrics.aggregate_messages(messages)
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=7)
+
+    def run():
+        report_metrics = metrics.build_metrics(aggregate, start_time, end_time, 7)
+        report_metrics["usage"] = usage.summarize(entries)
+        metrics.generate_weekly_report_markdown(report_metrics)
+    return run, 1, "reports"
+
+BENCHMARKS = {
+    "categorize_issue": setup_categorize_issue,
+    "completion_checks": setup_completion_checks,
+    "similar_past_tickets": setup_similar_past_tickets,
+    "knowledge_find_relevant": setup_knowledge_find_relevant,
+    "aggregate_messages": setup_aggregate_messages,
+    "weekly_report": setup_weekly_report,
+}
+
+def measure(setup, size, repeat):
+    """Best-of-repeat throughput plus peak memory of a single traced run"""
+    run, ops, unit = setup(size)
+    run()  # warm caches and lazy imports
+
+    # Like timeit's autorange: loop small workloads until a sample is long enough to time reliably
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        if time.perf_counter() - started >= MIN_SAMPLE_SECONDS:
+            break
+        loops *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        best = min(best, (time.perf_counter() - started) / loops)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": ops / best if best > 0 else 0,
+        "unit": unit,
+        "seconds": best,
+        "peak_kb": peak / 1024,
+    }
+
+def run_all(sizes, only=None, repeat=3):
+    """Run the selected benchmarks at each size"""
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        for size in sizes:
+            result = measure(setup, size, repeat)
+            results.setdefault(name, {})[str(size)] = result
+            print(f"{name:<26} {size:>7}  {result['ops_per_sec']:>14,.1f} {result['unit']}/s  "
+                  f"{result['peak_kb']:>10,.1f} KB peak", flush=True)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+def compare(baseline, current, threshold):
+    """Return (rows, regressions) comparing current results against the baseline"""
+    rows, regressions = [], []
+    for name, sizes in current["results"].items():
+        for size, result in sizes.items():
+            base = baseline.get("results", {}).get(name, {}).get(size)
+            if not base:
+                rows.append((name, size, None, None, "new"))
+                continue
+            speed = result["ops_per_sec"] / base["ops_per_sec"] - 1 if base["ops_per_sec"] else 0
+            memory = result["peak_kb"] / base["peak_kb"] - 1 if base["peak_kb"] else 0
+            problems = []
+            if speed < -threshold:
+                problems.append("slower")
+            if memory > threshold:
+                problems.append("more memory")
+            status = ", ".join(problems) or "ok"
+            rows.append((name, size, speed, memory, status))
+            if problems:
+                regressions.append((name, size, status))
+    return rows, regressions
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Saved results to {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the bot's pure-Python hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and print results")
+    compare_parser = commands.add_parser("compare", help="run (or load) results and compare to the baseline")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                         help="comma-separated corpus sizes")
+        sub.add_argument("--only", help="comma-separated benchmark names")
+        sub.add_argument("--repeat", type=int, default=3, help="timed samples per benchmark (best is kept)")
+    run_parser.add_argument("--output", help="write results JSON here")
+    run_parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE_PATH}")
+    compare_parser.add_argument("--baseline", default=BASELINE_PATH)
+    compare_parser.add_argument("--current", help="results JSON from an earlier run instead of running now")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="fractional slowdown or memory growth that counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = set(args.only.split(",")) if args.only else None
+
+    if args.command == "run":
+        results = run_all(sizes, only, args.repeat)
+        if args.output:
+            _save(results, args.output)
+        if args.save_baseline:
+            _save(results, BASELINE_PATH)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; create one with: python benchmarks/bench.py run --save-baseline")
+        return 2
+    baseline = _load(args.baseline)
+    current = _load(args.current) if args.current else run_all(sizes, only, args.repeat)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    print(f"\n{'benchmark':<26} {'size':>7} {'speed':>9} {'memory':>9}  status")
+    for name, size, speed, memory, status in rows:
+        speed_text = f"{speed:+.1%}" if speed is not None else "-"
+        memory_text = f"{memory:+.1%}" if memory is not None else "-"
+        print(f"{name:<26} {size:>7} {speed_text:>9} {memory_text:>9}  {status}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regressions above {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
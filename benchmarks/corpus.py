@@ -0,0 +1,99 @@
+import random
+import time
+
+# Synthetic #it channel traffic shaped like conversations_history/replies output:
+# top-level tickets, user follow-ups, bot replies, escalation reactions and texts
+ISSUE_TEMPLATES = [
+    "I can't log in to {app}, it says my password expired",
+    "Can I get access to {app} for the new project?",
+    "My laptop screen is flickering after the update",
+    "The printer on the 3rd floor is not working again",
+    "VPN keeps disconnecting when I join a Zoom call",
+    "Need a {app} license for a new hire starting Monday",
+    "Getting an error when I open {app} in Chrome",
+    "Wifi in the conference room is super slow",
+    "Please update my Slack display name and email alias",
+    "Okta push notifications stopped arriving on my phone",
+    "Can someone reset my MFA? I got a new phone",
+    "Outlook calendar invites are not syncing with Gmail",
+]
+APPS = ["Figma", "GitHub", "Jira", "Salesforce", "Zoom", "Notion", "Okta", "1Password", "Vanta", "Google Drive"]
+FOLLOWUPS = [
+    "thanks!", "thanks but it still doesn't work", "that worked", "still getting the same error",
+    "got it", "ok I tried that, what next?", "all good now", "no luck, same problem",
+]
+BOT_REPLIES = [
+    "Hi! Try signing out of {app} and clearing your browser cache, then sign back in.",
+    "Thanks for reaching out. Please restart the device and let us know if it persists.",
+    "🔴 This issue needs escalation. <@U0IT> will follow up shortly.",
+]
+FIXES = [
+    "reset the password in Okta", "reinstalled the app", "granted access in the admin console",
+    "restarted the router", "re-enrolled the device in MFA", "cleared the browser cache",
+]
+
+def generate_messages(count, seed=0, start=None):
+    """About count channel messages: each ticket is followed by its thread replies"""
+    rng = random.Random(seed)
+    ts = start or time.time() - 7 * 24 * 60 * 60
+    messages = []
+    while len(messages) < count:
+        ts += rng.uniform(30, 600)
+        thread_ts = f"{ts:.6f}"
+        app = rng.choice(APPS)
+        messages.append({
+            "ts": thread_ts,
+            "user": f"U{rng.randint(1, 400):04d}",
+            "text": rng.choice(ISSUE_TEMPLATES).format(app=app),
+            "reply_count": 0,
+        })
+        for reply in range(rng.randint(0, 4)):
+            ts += rng.uniform(5, 120)
+            if reply % 2 == 0:
+                message = {"ts": f"{ts:.6f}", "thread_ts": thread_ts, "bot_id": "B0BOT",
+                           "text": rng.choice(BOT_REPLIES).format(app=app)}
+                if rng.random() < 0.1:
+                    message["reactions"] = [{"name": "thumbsdown", "count": 1}]
+            else:
+                message = {"ts": f"{ts:.6f}", "thread_ts": thread_ts, "user": f"U{rng.randint(1, 400):04d}",
+                           "text": rng.choice(FOLLOWUPS)}
+            messages.append(message)
+    return messages[:count]
+
+def generate_resolutions(count, seed=0):
+    """Resolution summary records in the shape knowledge.summarize_thread stores"""
+    rng = random.Random(seed)
+    records = {}
+    for i in range(count):
+        app = rng.choice(APPS)
+        records[f"{1700000000 + i * 60:.6f}"] = {
+            "problem": rng.choice(ISSUE_TEMPLATES).format(app=app),
+            "fix": rng.choice(FIXES),
+            "category": None,
+            "outcome": rng.choice(["resolved", "escalated"]),
+            "created": 1700000000 + i * 60,
+        }
+    return records
+
+def generate_usage_entries(count, seed=0, start=None):
+    """Token usage log entries in the shape usage.record writes"""
+    rng = random.Random(seed)
+    ts = start or time.time() - 7 * 24 * 60 * 60
+    entries = []
+    for i in range(count):
+        ts += rng.uniform(10, 300)
+        prompt_tokens = rng.randint(400, 3000)
+        completion_tokens = rng.randint(50, 600)
+        entries.append({
+            "ts": ts,
+            "thread_ts": f"{1700000000 + i // 3}.000000",
+            "category": rng.choice(["Password/Login", "Access Request", "Hardware", "Other"]),
+            "purpose": "ticket",
+            "model": "gpt-4o-mini",
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": rng.choice([0, 0, 1024]),
+            "completion_tokens": completion_tokens,
+            "latency_ms": rng.uniform(400, 4000),
+            "cost": (prompt_tokens * 0.15 + completion_tokens * 0.60) / 1_000_000,
+        })
+    return entries
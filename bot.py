@@ -1,47 +1,342 @@
 import os
+import json
 import logging
+import signal
 import time
-import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
-from openai import OpenAI
-from apscheduler.schedulers.background import BackgroundScheduler
+import knowledge
+import assignees
+import escalations
+import tracing
+import ticket_queue
+import catchup
+import router
+import model_router
+import usage
+# Imported eagerly: router and knowledge already need it for categorization, and the heavy
+# archive/numpy imports stay deferred inside the report functions
 import metrics
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+_PROCESS_START = time.perf_counter()
 
-app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
-openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+tracing.configure_logging()
+logger = logging.getLogger(__name__)
 
 IT_CHANNEL_NAME = os.environ.get("IT_CHANNEL_NAME", "it")
 BOT_NAME = "IT AI Support"
 
-# Initialize scheduler for weekly reports
-scheduler = BackgroundScheduler()
+# Startup profiling and readiness
+# STARTUP_PROFILE=1 logs how long each startup phase (imports, client construction,
+# socket connect, cache warm-up) took. READY_FILE / HEALTH_PORT expose readiness to
+# the platform once the socket is connected and caches are warm.
+STARTUP_PROFILE = os.environ.get("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+READY_FILE = os.environ.get("READY_FILE")
+HEALTH_PORT = os.environ.get("HEALTH_PORT")
+
+# Durable ticket queue: accepted messages are written to SQLite before Slack is
+# acked, drained by worker threads, and replayed on boot if a restart interrupted them
+TICKET_WORKERS = int(os.environ.get("TICKET_WORKERS", "8"))
+SHUTDOWN_DEADLINE = float(os.environ.get("SHUTDOWN_DEADLINE", "25"))
+
+ready = threading.Event()
+shutdown_requested = threading.Event()
+_startup_phases = []
+_first_response_logged = False
+
+_app = None
+_openai_client = None
+_scheduler = None
+_it_channel_id = None
+_client_lock = threading.Lock()
+
+@contextmanager
+def startup_phase(name):
+    """Time a startup phase and record it for the startup profile"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _startup_phases.append((name, elapsed))
+        if STARTUP_PROFILE:
+            logger.info(f"[startup] {name}: {elapsed * 1000:.1f} ms")
+
+def log_startup_profile():
+    """Print where startup time was spent, slowest phase first"""
+    total = time.perf_counter() - _PROCESS_START
+    lines = [f"Startup profile ({total:.2f}s since process start):"]
+    for name, elapsed in sorted(_startup_phases, key=lambda p: p[1], reverse=True):
+        lines.append(f"  {name:<28} {elapsed * 1000:8.1f} ms")
+    logger.info("\n".join(lines))
+
+def get_app():
+    """Build the Slack app and register event handlers on first use"""
+    global _app
+    if _app is None:
+        with _client_lock:
+            if _app is None:
+                with startup_phase("import slack_bolt"):
+                    from slack_bolt import App
+                with startup_phase("build Slack app"):
+                    app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
+                    app.event("message", middleware=[persist_message_event])(on_message_event)
+                    app.event("reaction_added")(tracing.traced("reaction_added")(handle_reaction))
+                    app.event("reaction_removed")(tracing.traced("reaction_removed")(handle_reaction))
+                    app.event("app_mention")(tracing.traced("app_mention")(handle_mentions))
+                _app = app
+    return _app
+
+def is_ticket_message(client, event):
+    """Check whether a message event is a user message in the IT channel"""
+    # Ignore messages with subtypes (edits, deletes, etc) and bot messages (including our own)
+    if event.get("subtype") or event.get("bot_id") or event.get("bot_profile"):
+        return False
+    return is_it_channel(client, event.get("channel"))
+
+def persist_message_event(body, client, next):
+    """Persist IT channel messages to the durable queue before the event is acked"""
+    event = body.get("event", {})
+    try:
+        # Feed every message (including Assist bot posts) to the assignee registry
+        assignees.observe(event)
+        if is_ticket_message(client, event):
+            # Keyed by channel:ts so Slack retries and catch-up scans dedupe against live events
+            ticket_queue.enqueue(f"{event.get('channel')}:{event.get('ts')}", "message", event)
+    except Exception as e:
+        logger.error(f"Error persisting message event: {str(e)}")
+    next()
+
+def on_message_event():
+    """Message events are processed by the ticket queue workers once persisted"""
+
+def process_queued_event(kind, event, replayed=False):
+    """Run a queued event through the normal message handler inside its own trace"""
+    from slack_bolt.context.say import Say
+
+    client = get_app().client
+    if replayed:
+        # A process killed after say() but before the entry was finished already answered it
+        try:
+            if catchup.has_bot_reply(client, event):
+                logger.info(f"Skipping replayed {kind} {event.get('ts')}: already answered")
+                return
+        except Exception as e:
+            logger.error(f"Error checking replayed {kind} for a reply: {str(e)}")
+    post = Say(client=client, channel=event.get("channel"))
+
+    def say(*args, **kwargs):
+        # Map each reply to its thread so a 👎 on it escalates the thread, not the reply
+        response = post(*args, **kwargs)
+        assignees.record_reply(response.get("ts"), kwargs.get("thread_ts"))
+        return response
+
+    tracing.traced(kind)(handle_message_events)(event=event, say=say, client=client)
+
+def on_socket_message(message):
+    """Run a catch-up scan whenever Slack says hello (first connect and every reconnect)"""
+    if '"hello"' not in message:
+        return
+    try:
+        if json.loads(message).get("type") != "hello":
+            return
+        client = get_app().client
+        channel_id = get_it_channel_id(client)
+        if channel_id:
+            catchup.scan_in_background(client, channel_id)
+    except Exception as e:
+        logger.error(f"Error starting catch-up scan: {str(e)}")
+
+def request_shutdown(signum, frame):
+    """Signal handler: begin a graceful shutdown"""
+    logger.info(f"Received signal {signum}, shutting down")
+    shutdown_requested.set()
 
+def shutdown(handler, scheduler):
+    """Stop intake, let in-flight tickets finish within the deadline, then release resources"""
+    ready.clear()
+    if READY_FILE and os.path.exists(READY_FILE):
+        os.remove(READY_FILE)
+
+    # Closing the socket stops new events; replies still go out over the Web API
+    try:
+        handler.close()
+    except Exception as e:
+        logger.error(f"Error closing socket connection: {str(e)}")
+
+    escalations.flush_pending()
+    ticket_queue.drain(SHUTDOWN_DEADLINE)
+    scheduler.shutdown(wait=False)
+    ticket_queue.close()
+    logger.info(f"{BOT_NAME} stopped")
+
+def get_openai_client():
+    """Build the OpenAI client on first use (the openai import alone is ~0.5s)"""
+    global _openai_client
+    if _openai_client is None:
+        with _client_lock:
+            if _openai_client is None:
+                with startup_phase("import openai"):
+                    from openai import OpenAI
+                with startup_phase("build OpenAI client"):
+                    _openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _openai_client
+
+def create_chat_completion(thread_ts=None, category=None, **kwargs):
+    """Call chat completions through the model router inside a trace span and record token usage"""
+    def record_discarded(model, response, latency):
+        # A hedged duplicate that lost the race still cost tokens
+        usage.record(response, model, latency, thread_ts=thread_ts, category=category, purpose="hedge")
+
+    with tracing.span("openai.chat.completions", model=kwargs.get("model")) as attrs:
+        response, model, latency = model_router.complete(get_openai_client, on_discarded=record_discarded, **kwargs)
+        attrs["model"] = model
+        entry = usage.record(response, model, latency, thread_ts=thread_ts, category=category)
+        if entry:
+            attrs["prompt_tokens"] = entry["prompt_tokens"]
+            attrs["cached_tokens"] = entry["cached_tokens"]
+            attrs["completion_tokens"] = entry["completion_tokens"]
+        return response
+
+def categorize_thread(messages, fallback_text):
+    """Categorize a thread by its opening message, for usage accounting"""
+    for msg in messages:
+        if not msg.get("bot_id"):
+            return metrics.categorize_issue(msg.get("text", ""))
+    return metrics.categorize_issue(fallback_text)
+
+def get_scheduler():
+    """Build the background scheduler for weekly reports on first use"""
+    global _scheduler
+    if _scheduler is None:
+        with startup_phase("import apscheduler"):
+            from apscheduler.schedulers.background import BackgroundScheduler
+        _scheduler = BackgroundScheduler()
+    return _scheduler
+
+def get_it_channel_id(client):
+    """Resolve and cache the IT channel ID so events don't need a conversations_info call"""
+    global _it_channel_id
+    if _it_channel_id is None:
+        cursor = None
+        while True:
+            result = client.conversations_list(
+                exclude_archived=True,
+                limit=1000,
+                cursor=cursor
+            )
+            for channel in result.get("channels", []):
+                if channel.get("name") == IT_CHANNEL_NAME:
+                    _it_channel_id = channel.get("id")
+                    return _it_channel_id
+            cursor = result.get("response_metadata", {}).get("next_cursor")
+            if not cursor:
+                break
+    return _it_channel_id
+
+def is_it_channel(client, channel_id):
+    """Check whether an event came from the IT channel"""
+    try:
+        it_channel_id = get_it_channel_id(client)
+    except Exception as e:
+        logger.error(f"Error resolving IT channel: {str(e)}")
+        it_channel_id = None
+
+    if it_channel_id:
+        return channel_id == it_channel_id
+
+    # Fall back to a lookup if the channel list could not be resolved
+    channel_info = client.conversations_info(channel=channel_id)
+    return channel_info["channel"]["name"] == IT_CHANNEL_NAME
+
+def mark_ready():
+    """Flip the readiness signal once the socket is connected and caches are warm"""
+    ready.set()
+    if READY_FILE:
+        try:
+            with open(READY_FILE, "w") as f:
+                f.write(str(time.time()))
+        except OSError as e:
+            logger.error(f"Could not write ready file {READY_FILE}: {str(e)}")
+    logger.info(f"{BOT_NAME} is ready ({time.perf_counter() - _PROCESS_START:.2f}s after process start)")
+
+def record_first_response():
+    """Log time-to-first-response after a deploy"""
+    global _first_response_logged
+    if _first_response_logged:
+        return
+    _first_response_logged = True
+    logger.info(f"First response sent {time.perf_counter() - _PROCESS_START:.2f}s after process start")
+
+def probe_response(path):
+    """Status, content type and body for the /ready, /health and /stats endpoints"""
+    if path == "/stats":
+        return 200, "application/json", json.dumps({"routing": router.stats(), "models": model_router.stats()}).encode()
+    if path in ("/ready", "/readyz"):
+        status = 200 if ready.is_set() else 503
+    elif path in ("/health", "/healthz"):
+        status = 200
+    else:
+        status = 404
+    return status, "text/plain", b"ok" if status == 200 else b"not ready"
+
+def start_health_server(port):
+    """Serve /ready (200 once ready, 503 before) for platform readiness probes, plus /stats"""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, content_type, body = probe_response(self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer(("0.0.0.0", int(port)), HealthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Health server listening on port {port}")
+    return server
+
+@tracing.traced("weekly_report")
 def schedule_weekly_report():
     """Schedule weekly report generation"""
     try:
-        # Get channel ID for IT channel
-        result = app.client.conversations_list()
-        channels = result.get("channels", [])
-        channel_id = None
-
-        for channel in channels:
-            if channel.get("name") == IT_CHANNEL_NAME:
-                channel_id = channel.get("id")
-                break
+        client = tracing.traced_client(get_app().client)
+        channel_id = get_it_channel_id(client)
 
         if channel_id:
-            metrics.generate_and_post_weekly_report(app.client, channel_id, post_to_slack=True)
+            metrics.generate_and_post_weekly_report(client, channel_id, post_to_slack=True)
         else:
             logger.error(f"Could not find channel: {IT_CHANNEL_NAME}")
 
     except Exception as e:
         logger.error(f"Error in scheduled report: {str(e)}")
 
+@tracing.traced("archive_sync")
+def sync_history_archive():
+    """Archive finished days of #it history for long-range trends (daily, and once at startup)"""
+    try:
+        import archive
+        if not archive.available():
+            return
+        client = get_app().client
+        channel_id = get_it_channel_id(client)
+        if channel_id:
+            archive.sync(client, channel_id)
+    except Exception as e:
+        logger.error(f"Error syncing history archive: {str(e)}")
+
+def add_scheduled_jobs(scheduler):
+    """Weekly report every Monday at 9 AM; history archive daily after midnight and once now"""
+    scheduler.add_job(schedule_weekly_report, 'cron', day_of_week='mon', hour=9, minute=0)
+    scheduler.add_job(sync_history_archive, 'cron', hour=0, minute=15)
+    # No trigger: runs once right away on a scheduler thread, so a first-run backfill never blocks events
+    scheduler.add_job(sync_history_archive)
+
 # TheGuarantors IT Environment
 THEGUARANTORS_TOOLS = """
 **TheGuarantors IT Environment:**
@@ -63,8 +358,11 @@ THEGUARANTORS_TOOLS = """
 - Other: 1Password, Okta, AWS, Stripe, Salesforce, and 80+ other SaaS apps
 """
 
+# History threads quiet for this long count as finished and worth summarizing
+PAST_TICKET_MIN_AGE = 24 * 60 * 60
+
 def get_similar_past_tickets(client, channel_id, user_message, limit=5):
-    """Search past IT tickets for similar issues and resolutions"""
+    """Search past IT tickets for similar issues; only the history page is read, never the threads"""
     try:
         # Get recent messages from the channel (last 200 messages)
         history = client.conversations_history(
@@ -72,35 +370,26 @@ def get_similar_past_tickets(client, channel_id, user_message, limit=5):
             limit=200
         )
 
-        # Look for threads that might contain resolutions
+        # Look for finished threads that might contain resolutions
+        quiet_since = time.time() - PAST_TICKET_MIN_AGE
+        user_keywords = set(user_message.lower().split())
         similar_tickets = []
         for message in history.get("messages", []):
             msg_text = message.get("text", "").lower()
 
             # Check if this ticket is similar to the current issue
             # Simple keyword matching (could be enhanced with embeddings)
-            user_keywords = set(user_message.lower().split())
             msg_keywords = set(msg_text.split())
 
-            # If there's significant overlap, consider it similar
+            # If there's significant overlap, consider it similar. reply_count and
+            # latest_reply come with the history page, so no thread fetch is needed
             overlap = len(user_keywords & msg_keywords)
-            if overlap >= 2 and message.get("thread_ts"):
-                # Get the thread to see resolution
-                try:
-                    thread = client.conversations_replies(
-                        channel=channel_id,
-                        ts=message.get("ts"),
-                        limit=10
-                    )
-
-                    thread_messages = thread.get("messages", [])
-                    if len(thread_messages) > 2:  # Has conversation/resolution
-                        similar_tickets.append({
-                            "issue": msg_text[:200],
-                            "thread": thread_messages[:5]
-                        })
-                except:
-                    pass
+            if (overlap >= 2 and message.get("reply_count", 0) >= 2
+                    and float(message.get("latest_reply", 0)) < quiet_since):
+                similar_tickets.append({
+                    "issue": msg_text[:200],
+                    "ts": message.get("ts")
+                })
 
             if len(similar_tickets) >= limit:
                 break
@@ -110,7 +399,6 @@ def get_similar_past_tickets(client, channel_id, user_message, limit=5):
         logger.error(f"Error fetching past tickets: {str(e)}")
         return []
 
-@app.event("message")
 def handle_message_events(event, say, client):
     try:
         # Ignore messages with subtypes (edits, deletes, etc)
@@ -125,10 +413,7 @@ def handle_message_events(event, say, client):
         is_thread_reply = event.get("thread_ts") is not None and event.get("thread_ts") != event.get("ts")
 
         channel_id = event.get("channel")
-        channel_info = client.conversations_info(channel=channel_id)
-        channel_name = channel_info["channel"]["name"]
-
-        if channel_name != IT_CHANNEL_NAME:
+        if not is_it_channel(client, channel_id):
             return
 
         user_message = event.get("text", "")
@@ -137,7 +422,7 @@ def handle_message_events(event, say, client):
         if is_thread_reply:
             thread_ts = event.get("thread_ts")
             current_user = event.get("user")
-            logger.info(f"Thread conversation from {current_user}: {user_message}")
+            logger.info(f"Thread conversation from {current_user}: {tracing.redact(user_message)}")
 
             # Get thread history for context
             try:
@@ -149,27 +434,34 @@ def handle_message_events(event, say, client):
 
                 # Find the original ticket creator (first message in thread)
                 original_creator = None
-                assignee_mention = None
-                assignee_user_id = None
-
                 for msg in replies.get("messages", []):
                     # First non-bot message is the ticket creator
                     if not msg.get("bot_id") and original_creator is None:
                         original_creator = msg.get("user")
 
-                    # Find assignee from Assist bot message
-                    text = msg.get("text", "")
-                    if "Assignee:" in text or "assignee" in text.lower():
-                        user_match = re.search(r'<@(\w+)>', text)
-                        if user_match:
-                            assignee_user_id = user_match.group(1)
-                            assignee_mention = f"<@{assignee_user_id}>"
+                # Assignee comes from the registry; seed it from this fetch after a restart
+                if assignees.get(thread_ts) is None:
+                    assignees.observe_all(replies.get("messages", []))
+                assignee = assignees.get(thread_ts)
+                assignee_user_id = assignee["user_id"] if assignee else None
+                assignee_mention = assignee["mention"] if assignee else None
 
                 # Only respond to the ORIGINAL ticket creator, not assignee or other users
                 if original_creator is None:
                     logger.info("Could not determine original creator, not responding")
                     return
 
+                # A human reply after escalation means the IT team has picked it up -
+                # capture the thread once so the fix can inform future tickets
+                escalated = escalations.is_escalated(thread_ts) or any(
+                    msg.get("bot_id") and "Issue needs escalation" in msg.get("text", "")
+                    for msg in replies.get("messages", [])
+                )
+                if escalated and current_user != original_creator:
+                    knowledge.summarize_in_background(
+                        get_openai_client, thread_ts, replies.get("messages", []), "escalated"
+                    )
+
                 if current_user != original_creator:
                     logger.info(f"Message from non-creator ({current_user}), not responding. Original creator: {original_creator}")
                     return
@@ -179,34 +471,14 @@ def handle_message_events(event, say, client):
                     logger.info(f"Message from assignee ({current_user}), not responding")
                     return
 
-                # Check for CLEAR completion messages (fully resolved, no "but" or continuation)
-                # Only trigger on simple thank you messages without additional context
-                message_lower = user_message.lower().strip()
-
-                # Simple completion phrases (short, standalone thank you messages)
-                simple_completions = [
-                    "thank you", "thanks", "thanks!", "thank you!", "ty", "thx",
-                    "got it", "got it!", "all good", "all set", "perfect", "awesome",
-                    "works now", "working now", "it works", "that worked", "fixed it",
-                    "resolved", "sorted", "done", "completed", "solved"
-                ]
-
-                # Check if it's a SIMPLE completion (short message, no "but", "however", "still", etc.)
-                continuation_words = ["but", "however", "still", "although", "though", "except",
-                                     "issue", "problem", "not", "doesn't", "don't", "can't", "won't",
-                                     "half", "part", "other", "another", "also", "and"]
-
-                is_simple_completion = (
-                    any(message_lower == phrase or message_lower == phrase + "!" for phrase in simple_completions) or
-                    (len(message_lower.split()) <= 5 and
-                     any(phrase in message_lower for phrase in simple_completions) and
-                     not any(word in message_lower for word in continuation_words))
-                )
-
-                if is_simple_completion:
+                # Clear completions ("thanks", "works now") get a templated reply without a model call
+                if router.route_followup(user_message) == router.THANKS:
                     logger.info("Detected simple completion/thank you message from ticket creator")
+                    knowledge.summarize_in_background(
+                        get_openai_client, thread_ts, replies.get("messages", []), "resolved"
+                    )
                     say(
-                        text="You're welcome! Glad we could help. If you need anything else, feel free to post a new message in this channel. Have a great day!",
+                        text=router.THANKS_RESPONSE,
                         thread_ts=thread_ts
                     )
                     return
@@ -278,7 +550,9 @@ After 2-3 failed attempts or when user seems stuck, suggest escalation."""
                 })
 
                 # Get ChatGPT response
-                response = openai_client.chat.completions.create(
+                response = create_chat_completion(
+                    thread_ts=thread_ts,
+                    category=categorize_thread(replies.get("messages", []), user_message),
                     model="gpt-4o-mini",
                     messages=context_messages,
                     temperature=0.7,
@@ -319,6 +593,7 @@ After 2-3 failed attempts or when user seems stuck, suggest escalation."""
                     thread_ts=thread_ts
                 )
 
+                record_first_response()
                 logger.info("Conversation response sent")
 
             except Exception as e:
@@ -329,95 +604,67 @@ After 2-3 failed attempts or when user seems stuck, suggest escalation."""
         # Handle new top-level messages
         thread_ts = event.get("ts")
 
-        logger.info(f"New IT ticket detected: {user_message}")
+        logger.info(f"New IT ticket detected: {tracing.redact(user_message)}")
         logger.info("Waiting for Assist bot to respond first...")
 
-        # Wait for Assist bot to respond (check every 2 seconds, max 20 seconds)
-        assist_responded = False
-        max_attempts = 10  # 10 attempts x 2 seconds = 20 seconds max
-
-        for attempt in range(max_attempts):
-            time.sleep(2)
-
-            # Check if there are any replies in the thread
-            try:
-                replies = client.conversations_replies(
-                    channel=channel_id,
-                    ts=thread_ts,
-                    limit=10
-                )
-
-                # Look for Assist bot's response
-                for message in replies.get("messages", []):
-                    if message.get("bot_id") or message.get("app_id"):
-                        # Found a bot response, assume it's Assist
-                        logger.info(f"Assist bot responded (attempt {attempt + 1})")
-                        assist_responded = True
-                        break
-
-                if assist_responded:
-                    break
-
-            except Exception as e:
-                logger.error(f"Error checking for Assist response: {str(e)}")
-                break
+        # Wait for Assist bot's message to arrive as an event (max 20 seconds)
+        wait_started = time.monotonic()
+        assist_responded = assignees.wait_for_assist(thread_ts, timeout=20)
+        if assist_responded:
+            logger.info(f"Assist bot responded after {time.monotonic() - wait_started:.1f}s")
+        else:
+            # The event may have been missed (e.g. during a reconnect) - check the thread once
+            assignees.resolve(client, channel_id, thread_ts)
+            assist_responded = assignees.wait_for_assist(thread_ts, timeout=0)
 
         if not assist_responded:
             logger.warning("Assist bot didn't respond within 20 seconds, responding anyway")
 
-        logger.info(f"Processing IT ticket: {user_message}")
+        logger.info(f"Processing IT ticket: {tracing.redact(user_message)}")
 
-        # Get similar past tickets for context
-        past_tickets = get_similar_past_tickets(client, channel_id, user_message, limit=3)
-        past_context = ""
-        if past_tickets:
-            past_context = "\n\n**Past Similar Tickets:**\n"
-            for i, ticket in enumerate(past_tickets, 1):
-                past_context += f"{i}. Issue: {ticket['issue'][:100]}...\n"
+        # Answer trivial intents from templates; only troubleshooting goes to the model
+        route = router.route_new_ticket(user_message)
 
-        # Check if this is a change request (not a technical issue)
-        change_keywords = ["change", "update my", "modify", "edit my", "adjust", "configure",
-                          "set up", "setup", "install", "add me", "remove me", "switch",
-                          "device", "settings", "preferences", "configuration"]
-        is_change_request = any(keyword in user_message.lower() for keyword in change_keywords)
+        if route == router.THANKS:
+            say(
+                text=router.THANKS_RESPONSE,
+                thread_ts=thread_ts
+            )
+            logger.info("Thank-you message acknowledged")
+            return
 
-        # Get assignee from Assist message for change requests
-        assignee_mention = None
-        if is_change_request:
-            time.sleep(3)  # Wait for Assist to post
-            try:
-                replies = client.conversations_replies(
-                    channel=channel_id,
-                    ts=thread_ts,
-                    limit=10
-                )
-                for message in replies.get("messages", []):
-                    text = message.get("text", "")
-                    if "Assignee:" in text or "assignee" in text.lower():
-                        user_match = re.search(r'<@(\w+)>', text)
-                        if user_match:
-                            assignee_mention = f"<@{user_match.group(1)}>"
-                        break
-            except:
-                pass
-
-        # If it's a change request, provide simple acknowledgment
-        if is_change_request and assignee_mention:
+        if route == router.ACCESS_REQUEST:
             say(
-                text=f"Thank you! We have received your request. {assignee_mention} is working on this and will reach out shortly.",
+                text=router.ACCESS_REQUEST_RESPONSE,
                 thread_ts=thread_ts
             )
-            logger.info("Change request acknowledged")
+            logger.info("Access request acknowledged")
             return
-        elif is_change_request:
+
+        if route == router.CHANGE_REQUEST:
+            # Get assignee from Assist message (give Assist a moment to post it)
+            assignee_mention = assignees.wait_for_assignee(thread_ts, timeout=3)
             say(
-                text="Thank you! We have received your request. Our IT team is working on this and will reach out shortly.",
+                text=router.change_request_response(assignee_mention),
                 thread_ts=thread_ts
             )
             logger.info("Change request acknowledged")
             return
 
-        response = openai_client.chat.completions.create(
+        # Get similar past resolutions for context, falling back to the issue text of
+        # matching history threads until the resolution cache has records for them
+        past_context = knowledge.format_for_prompt(knowledge.find_relevant(user_message, limit=3))
+        past_tickets = [] if past_context else get_similar_past_tickets(client, channel_id, user_message, limit=3)
+        if past_tickets:
+            past_context = "\n\n**Past Similar Tickets:**\n"
+            for i, ticket in enumerate(past_tickets, 1):
+                past_context += f"{i}. Issue: {ticket['issue'][:100]}...\n"
+                # Summarize the match once so the next similar ticket is served from the cache
+                knowledge.summarize_past_thread_in_background(get_openai_client, client, channel_id, ticket["ts"])
+
+        response = create_chat_completion(
+            thread_ts=thread_ts,
+            category=metrics.categorize_issue(user_message),
             model="gpt-4o-mini",
             messages=[
                 {
@@ -479,22 +726,7 @@ Keep responses clear, concise, and helpful. Match the user's energy and urgency
         ai_response = response.choices[0].message.content
 
         # Get assignee from Assist message for escalation option
-        assignee_for_escalation = None
-        try:
-            replies = client.conversations_replies(
-                channel=channel_id,
-                ts=thread_ts,
-                limit=10
-            )
-            for msg in replies.get("messages", []):
-                text = msg.get("text", "")
-                if "Assignee:" in text or "assignee" in text.lower():
-                    user_match = re.search(r'<@(\w+)>', text)
-                    if user_match:
-                        assignee_for_escalation = f"<@{user_match.group(1)}>"
-                    break
-        except:
-            pass
+        assignee_for_escalation = assignees.get_mention(thread_ts)
 
         # Add follow-up question with options
         if assignee_for_escalation:
@@ -519,6 +751,7 @@ Keep responses clear, concise, and helpful. Match the user's energy and urgency
             thread_ts=thread_ts
         )
 
+        record_first_response()
         logger.info("Response sent successfully")
 
     except Exception as e:
@@ -528,8 +761,8 @@ Keep responses clear, concise, and helpful. Match the user's energy and urgency
             thread_ts=event.get("thread_ts") or event.get("ts")
         )
 
-@app.event("reaction_added")
-def handle_reaction(event, client, say):
+def handle_reaction(event, client):
+    """Record a 👎 added or removed; the thread's escalation message follows after the debounce"""
     try:
         reaction = event.get("reaction")
         item = event.get("item", {})
@@ -541,65 +774,49 @@ def handle_reaction(event, client, say):
         if reaction not in ["-1", "thumbsdown"]:
             return
 
-        logger.info(f"Thumbs down reaction detected from user {user}")
-
-        # Get the thread messages to find the Assist bot message
-        thread_ts = message_ts
-        replies = client.conversations_replies(
-            channel=channel,
-            ts=thread_ts,
-            limit=20
-        )
-
-        # Find the Assist bot message with assignee info
-        assignee_name = None
-        for message in replies.get("messages", []):
-            text = message.get("text", "")
-            # Look for "Assignee:" pattern in Assist bot message
-            if "Assignee:" in text or "assignee" in text.lower():
-                # Try to extract the assignee name
-                # Pattern to match "Assignee: Name" or links to users
-                match = re.search(r'Assignee:\s*([^\n]+)', text)
-                if match:
-                    assignee_text = match.group(1).strip()
-                    # Extract user mention if present
-                    user_match = re.search(r'<@(\w+)>', assignee_text)
-                    if user_match:
-                        assignee_name = f"<@{user_match.group(1)}>"
-                    else:
-                        # Try to find a name (first word after "Assignee:")
-                        name_match = re.search(r'Assignee:\s*(\S+\s+\S+)', text)
-                        if name_match:
-                            assignee_name = name_match.group(1).strip()
-                    break
-
-        # Post escalation message
-        if assignee_name:
-            escalation_msg = f"🔴 **Issue needs escalation**\n\n<@{user}> indicated that the troubleshooting steps didn't resolve the issue.\n\n{assignee_name}, this ticket needs your attention."
-        else:
-            escalation_msg = f"🔴 **Issue needs escalation**\n\n<@{user}> indicated that the troubleshooting steps didn't resolve the issue.\n\nTheGuarantors IT team, this ticket needs further assistance."
-
-        say(
-            text=escalation_msg,
-            thread_ts=thread_ts
-        )
+        added = event.get("type") != "reaction_removed"
+        logger.info(f"Thumbs down reaction {'added' if added else 'removed'} by user {user}")
 
-        logger.info("Escalation message sent")
+        # Reactions on bot replies count toward their thread
+        thread_ts = assignees.thread_for(message_ts)
+        escalations.record_reaction(thread_ts, user, added)
+        escalations.schedule(client, channel, thread_ts, on_change=metrics.invalidate_daily_aggregate)
 
     except Exception as e:
         logger.error(f"Error handling reaction: {str(e)}")
 
-@app.event("app_mention")
 def handle_mentions(event, say, client):
     user_id = event["user"]
     message_text = event.get("text", "").lower()
 
+    # Long-range trends ("how did VPN tickets trend this year?") come from the history archive
+    if "trend" in message_text:
+        category = metrics.categorize_issue(message_text.replace("trend", ""))
+        summary = metrics.generate_trend_summary(client, event.get("channel"), None if category == "Other" else category)
+        say(summary or "❌ Trend data isn't available right now. Check logs for details.")
+        return
+
     # Check if user is requesting a report
     if "report" in message_text or "metrics" in message_text or "stats" in message_text:
-        say(f"Generating weekly metrics report... This may take a moment.")
-
         # Get channel ID
         channel_id = event.get("channel")
+        try:
+            start_date, end_date, explicit_range = metrics.parse_report_range(message_text)
+        except ValueError as e:
+            say(f"❌ I couldn't read that date range: {str(e)}. {metrics.REPORT_RANGE_USAGE}")
+            return
+
+        if explicit_range:
+            # Ad-hoc ranges are answered in Slack from cached daily aggregates
+            say(f"Generating report for {start_date.isoformat()} to {end_date.isoformat()}...")
+            summary = metrics.generate_range_report(client, channel_id, start_date, end_date)
+            if summary:
+                say(summary)
+            else:
+                say(f"❌ Error generating report. Check logs for details.")
+            return
+
+        say(f"Generating weekly metrics report... This may take a moment.")
         success = metrics.generate_and_post_weekly_report(client, channel_id, post_to_slack=True)
 
         if success:
@@ -607,20 +824,54 @@ def handle_mentions(event, say, client):
         else:
             say(f"❌ Error generating report. Check logs for details.")
     else:
-        say(f"Hi <@{user_id}>! I'm monitoring all messages in the IT channel and will respond with helpful suggestions automatically. Just post your IT issue and I'll help troubleshoot!\n\n💡 **Tip:** Mention me with 'report' or 'metrics' to generate a weekly performance report.")
+        say(f"Hi <@{user_id}>! I'm monitoring all messages in the IT channel and will respond with helpful suggestions automatically. Just post your IT issue and I'll help troubleshoot!\n\n💡 **Tip:** Mention me with 'report' or 'metrics' to generate a weekly performance report, or add a range like 'report last 30 days' or 'report 2026-09-01..2026-09-30'. Ask 'how did VPN tickets trend this year?' for a 12-month trend.")
 
 if __name__ == "__main__":
-    # Schedule weekly reports (every Monday at 9 AM)
-    scheduler.add_job(
-        schedule_weekly_report,
-        'cron',
-        day_of_week='mon',
-        hour=9,
-        minute=0
-    )
-    scheduler.start()
-    logger.info("Weekly report scheduler started (runs every Monday at 9 AM)")
+    if READY_FILE and os.path.exists(READY_FILE):
+        os.remove(READY_FILE)
+    if HEALTH_PORT:
+        start_health_server(HEALTH_PORT)
+
+    app = get_app()
+
+    with startup_phase("import socket mode adapter"):
+        from slack_bolt.adapter.socket_mode import SocketModeHandler
 
     handler = SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"))
+    # Socket Mode doesn't replay events missed while disconnected; catch up on every hello
+    handler.client.on_message_listeners.append(on_socket_message)
     logger.info(f"{BOT_NAME} is starting...")
-    handler.start()
+    with startup_phase("socket connect"):
+        handler.connect()
+
+    # Warm caches before declaring readiness so the first event doesn't pay for them
+    with startup_phase("warm IT channel cache"):
+        try:
+            get_it_channel_id(app.client)
+        except Exception as e:
+            logger.error(f"Error warming IT channel cache: {str(e)}")
+    with startup_phase("warm OpenAI client"):
+        get_openai_client()
+
+    # Schedule weekly reports (every Monday at 9 AM)
+    with startup_phase("start scheduler"):
+        scheduler = get_scheduler()
+        add_scheduled_jobs(scheduler)
+        scheduler.start()
+    logger.info("Scheduler started (weekly report every Monday at 9 AM, history archive daily)")
+
+    # Replay tickets a previous process accepted but didn't finish, then start draining
+    with startup_phase("start ticket queue"):
+        ticket_queue.recover()
+        ticket_queue.start_workers(TICKET_WORKERS, process_queued_event)
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+    tracing.install_profiler_signal()
+    mark_ready()
+    if STARTUP_PROFILE:
+        log_startup_profile()
+
+    while not shutdown_requested.wait(1):
+        pass
+    shutdown(handler, scheduler)
@@ -0,0 +1,135 @@
+import os
+import logging
+import threading
+import time
+
+import assignees
+import ticket_queue
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Catch-up covers a fixed age window rather than a "last seen" cursor: a cursor advanced
+# by live events right after a reconnect would skip messages missed just before it, and
+# the queue's channel:ts key already dedupes anything the live handler accepted
+CATCHUP_MAX_AGE = float(os.environ.get("CATCHUP_MAX_AGE", str(2 * 60 * 60)))
+CATCHUP_MAX_TICKETS = int(os.environ.get("CATCHUP_MAX_TICKETS", "50"))
+BATCH_WAIT_SECONDS = 5 * 60
+
+_scan_lock = threading.Lock()
+_bot_user_id = None
+
+def _get_bot_user_id(client):
+    """Our own bot user ID, used to tell whether a thread already has our reply"""
+    global _bot_user_id
+    if _bot_user_id is None:
+        _bot_user_id = client.auth_test().get("user_id")
+    return _bot_user_id
+
+def has_bot_reply(client, event):
+    """Whether we already replied after a message, e.g. before a restart interrupted its queue entry"""
+    thread_ts = event.get("thread_ts") or event.get("ts")
+    bot_user_id = _get_bot_user_id(client)
+    replies = client.conversations_replies(channel=event.get("channel"), ts=thread_ts, oldest=event.get("ts"), limit=100)
+    messages = replies.get("messages", [])
+    if messages and thread_ts == event.get("ts") and bot_user_id in messages[0].get("reply_users", []):
+        return True
+    return any(
+        message.get("user") == bot_user_id and float(message["ts"]) > float(event["ts"])
+        for message in messages
+    )
+
+def _enqueue(channel_id, message):
+    """Feed a missed message through the normal ticket pipeline"""
+    event = dict(message, channel=channel_id, type="message")
+    return ticket_queue.enqueue(f"{channel_id}:{message['ts']}", "message", event)
+
+def _catch_up_thread(client, channel_id, parent, floor):
+    """Queue the newest follow-up in a thread if it is recent and unanswered"""
+    replies = client.conversations_replies(channel=channel_id, ts=parent["ts"], limit=100)
+    messages = replies.get("messages", [])
+    assignees.observe_all(messages)
+    if not messages:
+        return 0
+
+    last = messages[-1]
+    if last.get("bot_id") or last.get("subtype") or float(last["ts"]) <= floor:
+        return 0
+    if last.get("ts") == parent.get("ts"):
+        return 0
+    return 1 if _enqueue(channel_id, last) else 0
+
+def _history(client, channel_id, floor):
+    """Channel messages newer than the floor, oldest first"""
+    messages = []
+    cursor = None
+    while True:
+        result = client.conversations_history(
+            channel=channel_id,
+            oldest=str(floor),
+            limit=200,
+            cursor=cursor
+        )
+        messages.extend(result.get("messages", []))
+        cursor = result.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            break
+    # Slack pages newest first
+    return sorted(messages, key=lambda message: float(message["ts"]))
+
+def _wait_for_queue(timeout):
+    """Let the ticket workers drain a catch-up batch before queuing the next one"""
+    deadline = time.monotonic() + timeout
+    while ticket_queue.pending_count() and time.monotonic() < deadline:
+        time.sleep(1)
+
+def scan(client, channel_id):
+    """Queue tickets and follow-ups from the last CATCHUP_MAX_AGE seconds that have no bot reply
+
+    Walks the window oldest first in batches of CATCHUP_MAX_TICKETS, waiting for the queue
+    to drain between batches, so a long outage is worked through without one big burst.
+    """
+    floor = time.time() - CATCHUP_MAX_AGE
+    bot_user_id = _get_bot_user_id(client)
+
+    queued = 0
+    batch = 0
+    for message in _history(client, channel_id, floor):
+        if batch >= CATCHUP_MAX_TICKETS:
+            _wait_for_queue(BATCH_WAIT_SECONDS)
+            batch = 0
+        if message.get("subtype") or message.get("bot_id"):
+            continue
+
+        if bot_user_id not in message.get("reply_users", []):
+            # Seed the assignee registry so the pipeline doesn't wait for an Assist event that already happened
+            if message.get("reply_count"):
+                replies = client.conversations_replies(channel=channel_id, ts=message["ts"], limit=20)
+                assignees.observe_all(replies.get("messages", []))
+            if _enqueue(channel_id, message):
+                batch += 1
+                queued += 1
+        elif float(message.get("latest_reply", 0)) > floor:
+            # Parents we already answered can still have follow-ups that arrived while we were away
+            added = _catch_up_thread(client, channel_id, message, floor)
+            batch += added
+            queued += added
+
+    if queued:
+        logger.info(f"Catch-up queued {queued} missed message(s) from the last {CATCHUP_MAX_AGE / 60:.0f} minutes")
+    return queued
+
+def scan_in_background(client, channel_id):
+    """Run a catch-up scan off the socket thread; overlapping requests in this process are dropped"""
+    if not _scan_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            tracing.traced("catchup")(scan)(client=client, channel_id=channel_id)
+        except Exception as e:
+            logger.error(f"Error in catch-up scan: {str(e)}")
+        finally:
+            _scan_lock.release()
+
+    threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,173 @@
+import os
+import logging
+import threading
+import time
+import contextvars
+
+import assignees
+import state
+
+logger = logging.getLogger(__name__)
+
+# Thumbs-down escalations, debounced per thread. Reactions are recorded as votes in
+# the shared state store as they arrive; once a thread has been quiet for
+# ESCALATION_DEBOUNCE_SECONDS, one flush posts the escalation message or updates it
+# in place. State per thread:
+#   escalation:       thread_ts -> {"channel", "message_ts", "users", "assignee", "created", "updated"}
+#   escalation_vote:  "thread_ts:user" -> reaction time
+#   escalation_flush: thread_ts -> flush start time, so only one process flushes a thread at once
+ESCALATION_DEBOUNCE_SECONDS = float(os.environ.get("ESCALATION_DEBOUNCE_SECONDS", "10"))
+FLUSH_TIMEOUT = 60
+MAX_THREADS = int(os.environ.get("ASSIGNEE_REGISTRY_SIZE", "5000"))
+
+ESCALATION_HEADER = "🔴 **Issue needs escalation**"
+
+_lock = threading.Lock()
+_timers = {}
+
+def _store():
+    return state.get_store()
+
+def record_reaction(thread_ts, user, added):
+    """Record a thumbs-down being added to or removed from a thread"""
+    key = f"{thread_ts}:{user}"
+    if added:
+        _store().set("escalation_vote", key, time.time(), max_entries=MAX_THREADS * 4)
+    else:
+        _store().delete("escalation_vote", key)
+
+def voters(thread_ts):
+    """Users with a thumbs-down in the thread, first reaction first"""
+    prefix = f"{thread_ts}:"
+    votes = [(reacted, key[len(prefix):]) for key, reacted in _store().items("escalation_vote") if key.startswith(prefix)]
+    return [user for _, user in sorted(votes)]
+
+def get(thread_ts):
+    """The persisted escalation state for a thread, or None"""
+    return _store().get("escalation", thread_ts)
+
+def is_escalated(thread_ts):
+    """Whether the thread currently has an active escalation"""
+    escalation = get(thread_ts)
+    return bool(escalation and escalation.get("users"))
+
+def escalated_threads():
+    """Thread timestamps with an active escalation - one count per thread for the reports"""
+    return {thread_ts for thread_ts, escalation in _store().items("escalation") if escalation.get("users")}
+
+def escalation_text(users, assignee_mention):
+    """The escalation message body for the current set of reactors"""
+    if not users:
+        return "⚪ Escalation withdrawn - the 👎 reactions were removed."
+    reactors = ", ".join(f"<@{user}>" for user in users)
+    verb = "indicated" if len(users) == 1 else "all indicated"
+    if assignee_mention:
+        return f"{ESCALATION_HEADER}\n\n{reactors} {verb} that the troubleshooting steps didn't resolve the issue.\n\n{assignee_mention}, this ticket needs your attention."
+    return f"{ESCALATION_HEADER}\n\n{reactors} {verb} that the troubleshooting steps didn't resolve the issue.\n\nTheGuarantors IT team, this ticket needs further assistance."
+
+def _claim_flush(thread_ts):
+    """Take the per-thread flush marker; stale markers from a crashed process are replaced"""
+    store = _store()
+    if store.add("escalation_flush", thread_ts, time.time()):
+        return True
+    started = store.get("escalation_flush", thread_ts)
+    if started is not None and time.time() - started > FLUSH_TIMEOUT:
+        store.set("escalation_flush", thread_ts, time.time())
+        return True
+    return False
+
+def _move_votes(from_ts, to_ts):
+    """Re-key votes recorded against a reply onto its parent thread"""
+    store = _store()
+    prefix = f"{from_ts}:"
+    for key, reacted in store.items("escalation_vote"):
+        if key.startswith(prefix):
+            store.add("escalation_vote", f"{to_ts}:{key[len(prefix):]}", reacted, max_entries=MAX_THREADS * 4)
+            store.delete("escalation_vote", key)
+
+def _flush_claimed(client, channel_id, thread_ts, on_change):
+    """Bring the escalation message in line with the votes; returns the parent ts if the votes were moved"""
+    users = voters(thread_ts)
+    escalation = get(thread_ts)
+    was_active = bool(escalation and escalation.get("users"))
+
+    if escalation is None:
+        if not users:
+            # Added and removed within the debounce window - nothing to say
+            return None
+        assignee = assignees.resolve(client, channel_id, thread_ts)
+        # A reaction on a reply we hadn't mapped yet: resolve fetched the thread and mapped it
+        parent = assignees.thread_for(thread_ts)
+        if parent != thread_ts:
+            _move_votes(thread_ts, parent)
+            return parent
+        escalation = {
+            "channel": channel_id,
+            "message_ts": None,
+            "users": [],
+            "assignee": assignee["mention"] if assignee else None,
+            "created": time.time(),
+        }
+    elif users == escalation.get("users"):
+        return None
+
+    text = escalation_text(users, escalation.get("assignee"))
+    if escalation.get("message_ts"):
+        client.chat_update(channel=channel_id, ts=escalation["message_ts"], text=text)
+        logger.info(f"Escalation message updated ({len(users)} reactor(s))")
+    else:
+        response = client.chat_postMessage(channel=channel_id, thread_ts=thread_ts, text=text)
+        escalation["message_ts"] = response.get("ts")
+        assignees.record_reply(escalation["message_ts"], thread_ts)
+        logger.info(f"Escalation message sent ({len(users)} reactor(s))")
+
+    escalation["users"] = users
+    escalation["updated"] = time.time()
+    _store().set("escalation", thread_ts, escalation, max_entries=MAX_THREADS)
+    if on_change and was_active != bool(users):
+        on_change(channel_id, thread_ts)
+    return None
+
+def flush(client, channel_id, thread_ts, on_change=None):
+    """Post or update the thread's single escalation message to match the current votes"""
+    if not _claim_flush(thread_ts):
+        # Another process is flushing; look again after it has finished
+        schedule(client, channel_id, thread_ts, on_change)
+        return
+    try:
+        parent = _flush_claimed(client, channel_id, thread_ts, on_change)
+    finally:
+        _store().delete("escalation_flush", thread_ts)
+    if parent:
+        flush(client, channel_id, parent, on_change)
+
+def schedule(client, channel_id, thread_ts, on_change=None):
+    """(Re)start the thread's debounce timer; the flush runs once reactions go quiet"""
+    ctx = contextvars.copy_context()
+
+    def run():
+        with _lock:
+            if _timers.get(thread_ts) is timer:
+                del _timers[thread_ts]
+        try:
+            ctx.run(flush, client, channel_id, thread_ts, on_change)
+        except Exception as e:
+            logger.error(f"Error flushing escalation: {str(e)}")
+
+    timer = threading.Timer(ESCALATION_DEBOUNCE_SECONDS, run)
+    timer.daemon = True
+    with _lock:
+        previous = _timers.get(thread_ts)
+        if previous is not None:
+            previous.cancel()
+        _timers[thread_ts] = timer
+    timer.start()
+
+def flush_pending():
+    """Run pending flushes now instead of waiting out the debounce (used at shutdown)"""
+    with _lock:
+        timers = list(_timers.values())
+        _timers.clear()
+    for timer in timers:
+        timer.cancel()
+        timer.function()
@@ -0,0 +1,21 @@
+import os
+import multiprocessing
+
+# HTTP event mode: gunicorn -c gunicorn.conf.py http_app:application
+bind = f"0.0.0.0:{os.environ.get('PORT', '3000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "4"))
+# Workers drain their ticket queue on exit; leave room for SHUTDOWN_DEADLINE
+graceful_timeout = int(float(os.environ.get("SHUTDOWN_DEADLINE", "25"))) + 5
+timeout = 60
+
+def post_worker_init(worker):
+    """Start the ticket queue, leader election and readiness in each forked worker"""
+    import http_app
+    http_app.start_worker_process()
+
+def worker_exit(server, worker):
+    """Drain in-flight tickets before the worker goes away"""
+    import http_app
+    http_app.stop_worker_process()
@@ -0,0 +1,137 @@
+import os
+import fcntl
+import logging
+import threading
+from http import HTTPStatus
+
+import bot
+import catchup
+import escalations
+import ticket_queue
+
+logger = logging.getLogger(__name__)
+
+# HTTP event mode: Slack posts events to /slack/events and gunicorn fans them out
+# across worker processes. Socket Mode (python bot.py) stays the default.
+EVENTS_PATH = os.environ.get("SLACK_EVENTS_PATH", "/slack/events")
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+LEADER_LOCK_PATH = os.environ.get("LEADER_LOCK_PATH", os.path.join(DATA_DIR, "leader.lock"))
+LEADER_RETRY_SECONDS = 30
+
+_leader_lock_file = None
+_scheduler = None
+
+def _status_line(status):
+    """'200 OK' style status line for a numeric status"""
+    try:
+        return f"{status} {HTTPStatus(status).phrase}"
+    except ValueError:
+        return str(status)
+
+def _dispatch(environ):
+    """Run a Slack request through Bolt (signature verification included) and return its response"""
+    from slack_bolt.request import BoltRequest
+
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    body = environ["wsgi.input"].read(length).decode("utf-8") if length else ""
+    headers = {
+        key[5:].replace("_", "-").lower(): value
+        for key, value in environ.items()
+        if key.startswith("HTTP_")
+    }
+    if environ.get("CONTENT_TYPE"):
+        headers["content-type"] = environ["CONTENT_TYPE"]
+
+    request = BoltRequest(body=body, query=environ.get("QUERY_STRING"), headers=headers)
+    return bot.get_app().dispatch(request)
+
+def application(environ, start_response):
+    """WSGI entry point: Slack events plus the readiness and stats probes"""
+    path = environ.get("PATH_INFO", "/")
+    method = environ.get("REQUEST_METHOD", "GET")
+
+    if method == "POST" and path == EVENTS_PATH:
+        response = _dispatch(environ)
+        headers = [(name, value) for name, values in response.headers.items() for value in values]
+        start_response(_status_line(response.status), headers)
+        return [response.body.encode("utf-8")]
+
+    if method == "GET":
+        status, content_type, body = bot.probe_response(path)
+    else:
+        status, content_type, body = 405, "text/plain", b"method not allowed"
+    start_response(_status_line(status), [("Content-Type", content_type)])
+    return [body]
+
+def _try_become_leader():
+    """Take the leader lock without blocking; the holder runs the once-per-box jobs"""
+    global _leader_lock_file
+    os.makedirs(os.path.dirname(LEADER_LOCK_PATH) or ".", exist_ok=True)
+    lock_file = open(LEADER_LOCK_PATH, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _leader_lock_file = lock_file
+    return True
+
+def _lead():
+    """Run the scheduler (weekly report, archive sync) and a startup catch-up scan in exactly one process"""
+    global _scheduler
+    logger.info(f"Worker {os.getpid()} is the leader (scheduler and catch-up)")
+    _scheduler = bot.get_scheduler()
+    bot.add_scheduled_jobs(_scheduler)
+    _scheduler.start()
+
+    # Slack retries undelivered HTTP events only for a short while; catch up on anything older
+    try:
+        client = bot.get_app().client
+        channel_id = bot.get_it_channel_id(client)
+        if channel_id:
+            catchup.scan_in_background(client, channel_id)
+    except Exception as e:
+        logger.error(f"Error starting catch-up scan: {str(e)}")
+
+def _elect_leader():
+    """Become leader now or keep retrying, so a crashed leader is replaced by a sibling"""
+    def run():
+        while not _try_become_leader():
+            if bot.shutdown_requested.wait(LEADER_RETRY_SECONDS):
+                return
+        _lead()
+
+    threading.Thread(target=run, name="leader-election", daemon=True).start()
+
+def start_worker_process():
+    """Per-process startup after gunicorn forks a worker"""
+    if not os.environ.get("SLACK_SIGNING_SECRET"):
+        raise RuntimeError("SLACK_SIGNING_SECRET is required in HTTP event mode")
+
+    app = bot.get_app()
+    try:
+        bot.get_it_channel_id(app.client)
+    except Exception as e:
+        logger.error(f"Error warming IT channel cache: {str(e)}")
+    bot.get_openai_client()
+
+    # recover() only requeues entries whose claiming process is gone, so every worker can call it
+    ticket_queue.recover()
+    ticket_queue.start_workers(bot.TICKET_WORKERS, bot.process_queued_event)
+    _elect_leader()
+    bot.mark_ready()
+
+def stop_worker_process():
+    """Let this worker's in-flight tickets finish, then release the leader lock"""
+    global _leader_lock_file
+    bot.ready.clear()
+    bot.shutdown_requested.set()
+    escalations.flush_pending()
+    ticket_queue.drain(bot.SHUTDOWN_DEADLINE)
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+    ticket_queue.close()
+    if _leader_lock_file is not None:
+        _leader_lock_file.close()
+        _leader_lock_file = None
+    logger.info(f"Worker {os.getpid()} stopped")
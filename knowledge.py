@@ -0,0 +1,193 @@
+import os
+import logging
+import re
+import threading
+import time
+
+import metrics
+import state
+import tracing
+import usage
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+KNOWLEDGE_CACHE_PATH = os.environ.get("KNOWLEDGE_CACHE_PATH", os.path.join(DATA_DIR, "resolutions.json"))
+MAX_RECORDS = int(os.environ.get("KNOWLEDGE_MAX_RECORDS", "1000"))
+
+SUMMARY_MODEL = "gpt-4o-mini"
+MAX_TRANSCRIPT_CHARS = 4000
+PENDING_TIMEOUT = 10 * 60
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9.\-]+")
+_STOPWORDS = {
+    "the", "and", "for", "but", "not", "you", "your", "with", "this", "that", "have", "has",
+    "are", "was", "can", "cant", "can't", "get", "got", "its", "it's", "my", "me", "i'm",
+    "on", "in", "to", "of", "is", "it", "a", "an", "be", "do", "does", "did", "when", "what",
+    "how", "from", "there", "they", "them", "please", "thanks", "thank", "help", "need",
+    "issue", "problem", "working", "work", "any", "all", "just", "now", "still", "again",
+}
+
+# Records live in the shared state store ("resolution" namespace); keyword sets
+# are derived per process and cached by thread_ts
+_lock = threading.Lock()
+_keyword_cache = {}
+_migrated = False
+
+def _keywords(text):
+    """Lower-cased content words used for matching"""
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS and len(w) > 2}
+
+def _store():
+    """The shared state store, importing the legacy JSON cache on first use"""
+    global _migrated
+    if not _migrated:
+        _migrated = True
+        state.import_json_file(KNOWLEDGE_CACHE_PATH, "resolution", max_entries=MAX_RECORDS)
+    return state.get_store()
+
+def _record_keywords(thread_ts, record):
+    """Keyword set for a stored record, computed once per process"""
+    keywords = _keyword_cache.get(thread_ts)
+    if keywords is None:
+        keywords = _keywords(f"{record.get('problem', '')} {record.get('fix', '')}")
+        with _lock:
+            if len(_keyword_cache) > MAX_RECORDS * 2:
+                _keyword_cache.clear()
+            _keyword_cache[thread_ts] = keywords
+    return keywords
+
+def has_summary(thread_ts):
+    """Check whether a thread has already been summarized"""
+    return _store().get("resolution", thread_ts) is not None
+
+def _transcript(messages):
+    """Flatten thread messages into a short transcript, skipping our follow-up boilerplate"""
+    lines = []
+    for msg in messages:
+        text = msg.get("text", "")
+        text = text.split("\n---\n**Did this help")[0].strip()
+        if not text:
+            continue
+        speaker = "Bot" if msg.get("bot_id") else "User"
+        lines.append(f"{speaker}: {text}")
+    transcript = "\n".join(lines)
+    return transcript[:MAX_TRANSCRIPT_CHARS]
+
+def _parse_summary(content):
+    """Extract the problem and fix lines from the summarizer output"""
+    problem_match = re.search(r"Problem:\s*(.+)", content)
+    fix_match = re.search(r"Fix:\s*(.+)", content)
+    if not problem_match or not fix_match:
+        return None, None
+    return problem_match.group(1).strip(), fix_match.group(1).strip()
+
+def summarize_thread(openai_client, thread_ts, messages, outcome):
+    """Summarize a completed thread into a compact problem -> fix record and store it"""
+    if not messages:
+        return None
+
+    transcript = _transcript(messages)
+    category = metrics.categorize_issue(messages[0].get("text", ""))
+    started = time.perf_counter()
+    with tracing.span("openai.chat.completions", model=SUMMARY_MODEL, purpose="resolution_summary"):
+        response = openai_client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": """Summarize this IT support thread for a knowledge base.
+Reply with exactly two lines and nothing else:
+Problem: <one sentence describing the user's problem, no names>
+Fix: <one or two sentences describing what resolved it, or "Escalated to IT team" if no fix was found>"""
+                },
+                {
+                    "role": "user",
+                    "content": transcript
+                }
+            ],
+            temperature=0,
+            max_tokens=150
+        )
+    usage.record(response, SUMMARY_MODEL, time.perf_counter() - started,
+                 thread_ts=thread_ts, category=category, purpose="resolution_summary")
+
+    problem, fix = _parse_summary(response.choices[0].message.content or "")
+    if not problem:
+        logger.warning(f"Could not parse summary for thread {thread_ts}")
+        return None
+
+    record = {
+        "problem": problem,
+        "fix": fix,
+        "outcome": outcome,
+        "category": category,
+        "created": time.time(),
+    }
+
+    _store().set("resolution", thread_ts, record, max_entries=MAX_RECORDS)
+
+    logger.info(f"Stored resolution summary for thread {thread_ts} ({outcome})")
+    return record
+
+def _summarize_once(thread_ts, summarize):
+    """Run summarize() in the background unless the thread is already summarized or pending"""
+    # The pending marker dedupes across threads and worker processes
+    store = _store()
+    if store.get("resolution", thread_ts) is not None:
+        return
+    if not store.add("resolution_pending", thread_ts, time.time(), max_entries=MAX_RECORDS):
+        # Ignore markers left behind by a process that died mid-summary
+        if time.time() - store.get("resolution_pending", thread_ts, 0) < PENDING_TIMEOUT:
+            return
+        store.set("resolution_pending", thread_ts, time.time(), max_entries=MAX_RECORDS)
+
+    def run():
+        try:
+            summarize()
+        except Exception as e:
+            logger.error(f"Error summarizing thread {thread_ts}: {str(e)}")
+        finally:
+            store.delete("resolution_pending", thread_ts)
+
+    tracing.run_in_thread(run)
+
+def summarize_in_background(openai_client_factory, thread_ts, messages, outcome):
+    """Summarize a completed thread once, off the request path"""
+    _summarize_once(thread_ts, lambda: summarize_thread(openai_client_factory(), thread_ts, messages, outcome))
+
+def summarize_past_thread_in_background(openai_client_factory, slack_client, channel_id, thread_ts):
+    """Summarize a finished thread found in channel history once; its replies are fetched off the request path"""
+    def summarize():
+        replies = slack_client.conversations_replies(channel=channel_id, ts=thread_ts, limit=20)
+        summarize_thread(openai_client_factory(), thread_ts, replies.get("messages", []), "history")
+
+    _summarize_once(thread_ts, summarize)
+
+def find_relevant(user_message, limit=3, min_overlap=2):
+    """Return the stored resolutions that best match a new ticket"""
+    query = _keywords(user_message)
+    if not query:
+        return []
+
+    category = metrics.categorize_issue(user_message)
+    scored = []
+    for thread_ts, record in _store().items("resolution"):
+        overlap = len(query & _record_keywords(thread_ts, record))
+        if overlap < min_overlap:
+            continue
+        # Prefer same-category fixes, then the most recent among equals
+        score = overlap + (1 if record.get("category") == category else 0)
+        scored.append((score, record.get("created", 0), record))
+
+    scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [record for _, _, record in scored[:limit]]
+
+def format_for_prompt(records):
+    """Render resolution records as prompt context"""
+    if not records:
+        return ""
+    context = "\n\n**Past Similar Tickets (problem → fix):**\n"
+    for i, record in enumerate(records, 1):
+        context += f"{i}. {record['problem']} → {record['fix']}\n"
+    return context
@@ -5,8 +5,172 @@ from datetime import datetime, timedelta
 from collections import Counter
 import re
 
+import escalations
+import state
+import tracing
+import usage
+
 logger = logging.getLogger(__name__)
 
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+DAILY_AGGREGATES_PATH = os.environ.get("DAILY_AGGREGATES_PATH", os.path.join(DATA_DIR, "daily_aggregates.json"))
+MAX_REPORT_DAYS = 366
+
+_migrated = False
+
+def aggregate_messages(messages, escalated=None):
+    """Count tickets, bot responses, escalations, categories and follow-ups in a batch of messages
+
+    Escalations are counted once per thread, however many 👎 reactions or escalation
+    messages it has. escalated is the set of thread timestamps with a persisted
+    escalation (see escalations.escalated_threads); those count for tickets in the batch.
+    """
+    bot_responses = 0
+    user_tickets = 0
+    escalated_threads = set()
+    issue_categories = []
+    threads_with_followup = 0
+
+    # Track threads
+    threads = {}
+
+    for message in messages:
+        # Skip bot messages for ticket counting
+        if message.get("bot_id"):
+            bot_responses += 1
+            # Check if this is in a thread
+            thread_ts = message.get("thread_ts")
+            if thread_ts:
+                if thread_ts not in threads:
+                    threads[thread_ts] = {"bot_responses": 0, "user_messages": 0, "escalated": False}
+                threads[thread_ts]["bot_responses"] += 1
+        else:
+            # User message - potential ticket
+            if not message.get("thread_ts") or message.get("thread_ts") == message.get("ts"):
+                # Top-level message = new ticket
+                user_tickets += 1
+                text = message.get("text", "")
+                category = categorize_issue(text)
+                issue_categories.append(category)
+
+                # Store thread start time
+                thread_ts = message.get("ts")
+                threads[thread_ts] = {
+                    "start_time": float(thread_ts),
+                    "bot_responses": 0,
+                    "user_messages": 1,
+                    "escalated": False
+                }
+            else:
+                # Follow-up message in thread
+                thread_ts = message.get("thread_ts")
+                if thread_ts in threads:
+                    threads[thread_ts]["user_messages"] += 1
+
+        # Check for escalation (thumbs down reaction or escalation message)
+        reactions = message.get("reactions", [])
+        for reaction in reactions:
+            if reaction.get("name") in ["thumbsdown", "-1"]:
+                thread_ts = message.get("thread_ts") or message.get("ts")
+                escalated_threads.add(thread_ts)
+                if thread_ts in threads:
+                    threads[thread_ts]["escalated"] = True
+
+        # Check for escalation in text
+        text = message.get("text", "").lower()
+        if "issue needs escalation" in text or "🔴" in text:
+            thread_ts = message.get("thread_ts") or message.get("ts")
+            escalated_threads.add(thread_ts)
+            if thread_ts in threads:
+                threads[thread_ts]["escalated"] = True
+
+    # Escalations posted inside threads never appear in channel history; use the persisted state
+    if escalated:
+        for thread_ts, thread_data in threads.items():
+            if thread_ts in escalated and "start_time" in thread_data:
+                escalated_threads.add(thread_ts)
+                thread_data["escalated"] = True
+
+    # Calculate metrics from threads
+    for thread_ts, thread_data in threads.items():
+        if thread_data.get("user_messages", 0) > 1:
+            threads_with_followup += 1
+
+    return {
+        "total_tickets": user_tickets,
+        "bot_responses": bot_responses,
+        "escalations": len(escalated_threads),
+        "tickets_with_followup": threads_with_followup,
+        "categories": dict(Counter(issue_categories)),
+    }
+
+def merge_aggregates(aggregates):
+    """Sum a list of aggregates produced by aggregate_messages"""
+    merged = {
+        "total_tickets": 0,
+        "bot_responses": 0,
+        "escalations": 0,
+        "tickets_with_followup": 0,
+        "categories": Counter(),
+    }
+    for aggregate in aggregates:
+        for key in ("total_tickets", "bot_responses", "escalations", "tickets_with_followup"):
+            merged[key] += aggregate.get(key, 0)
+        merged["categories"].update(aggregate.get("categories", {}))
+    merged["categories"] = dict(merged["categories"])
+    return merged
+
+def build_metrics(aggregate, start_time, end_time, days):
+    """Derive the report metrics from raw counts"""
+    user_tickets = aggregate["total_tickets"]
+    escalations = aggregate["escalations"]
+    threads_with_followup = aggregate["tickets_with_followup"]
+
+    # Calculate resolution rate (tickets without escalation)
+    resolved = user_tickets - escalations
+    resolution_rate = (resolved / user_tickets * 100) if user_tickets > 0 else 0
+
+    # Count common issues
+    issue_counts = Counter(aggregate["categories"])
+
+    # Estimated response time (bot responds in ~2-3 seconds, manual would be 15-30 min)
+    avg_bot_response_time = 3  # seconds
+    avg_manual_response_time = 20 * 60  # 20 minutes in seconds
+    time_saved_seconds = user_tickets * (avg_manual_response_time - avg_bot_response_time)
+    time_saved_hours = time_saved_seconds / 3600
+
+    return {
+        "period_days": days,
+        "start_date": start_time,
+        "end_date": end_time,
+        "total_tickets": user_tickets,
+        "bot_responses": aggregate["bot_responses"],
+        "escalations": escalations,
+        "resolved": resolved,
+        "resolution_rate": resolution_rate,
+        "common_issues": issue_counts.most_common(5),
+        "avg_response_time": avg_bot_response_time,
+        "time_saved_hours": time_saved_hours,
+        "tickets_with_followup": threads_with_followup,
+        "followup_rate": (threads_with_followup / user_tickets * 100) if user_tickets > 0 else 0
+    }
+
+def fetch_history(client, channel_id, oldest, latest=None):
+    """Page through channel history between two timestamps"""
+    messages = []
+    cursor = None
+    while True:
+        kwargs = {"channel": channel_id, "oldest": str(oldest), "limit": 1000}
+        if latest is not None:
+            kwargs["latest"] = str(latest)
+        if cursor:
+            kwargs["cursor"] = cursor
+        result = client.conversations_history(**kwargs)
+        messages.extend(result.get("messages", []))
+        cursor = result.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            return messages
+
 def analyze_slack_history(client, channel_id, days=7):
     """Analyze Slack history for the past N days"""
     try:
@@ -15,136 +179,166 @@ def analyze_slack_history(client, channel_id, days=7):
         start_time = end_time - timedelta(days=days)
         start_ts = start_time.timestamp()
 
-        # Fetch messages from Slack (increased limit for better analysis)
-        result = client.conversations_history(
-            channel=channel_id,
-            oldest=str(start_ts),
-            limit=2000
-        )
-
-        messages = result.get("messages", [])
-
-        # Analyze messages
-        bot_responses = 0
-        user_tickets = 0
-        escalations = 0
-        issue_categories = []
-        response_times = []
-        threads_with_followup = 0
-
-        # Track threads
-        threads = {}
-
-        for message in messages:
-            # Skip bot messages for ticket counting
-            if message.get("bot_id"):
-                bot_responses += 1
-                # Check if this is in a thread
-                thread_ts = message.get("thread_ts")
-                if thread_ts:
-                    if thread_ts not in threads:
-                        threads[thread_ts] = {"bot_responses": 0, "user_messages": 0, "escalated": False}
-                    threads[thread_ts]["bot_responses"] += 1
-            else:
-                # User message - potential ticket
-                if not message.get("thread_ts") or message.get("thread_ts") == message.get("ts"):
-                    # Top-level message = new ticket
-                    user_tickets += 1
-                    text = message.get("text", "")
-                    category = categorize_issue(text)
-                    issue_categories.append(category)
-
-                    # Store thread start time
-                    thread_ts = message.get("ts")
-                    threads[thread_ts] = {
-                        "start_time": float(thread_ts),
-                        "bot_responses": 0,
-                        "user_messages": 1,
-                        "escalated": False
-                    }
-                else:
-                    # Follow-up message in thread
-                    thread_ts = message.get("thread_ts")
-                    if thread_ts in threads:
-                        threads[thread_ts]["user_messages"] += 1
-
-            # Check for escalation (thumbs down reaction or escalation message)
-            reactions = message.get("reactions", [])
-            for reaction in reactions:
-                if reaction.get("name") in ["thumbsdown", "-1"]:
-                    escalations += 1
-                    thread_ts = message.get("thread_ts") or message.get("ts")
-                    if thread_ts in threads:
-                        threads[thread_ts]["escalated"] = True
-
-            # Check for escalation in text
-            text = message.get("text", "").lower()
-            if "issue needs escalation" in text or "🔴" in text:
-                escalations += 1
-                thread_ts = message.get("thread_ts") or message.get("ts")
-                if thread_ts in threads:
-                    threads[thread_ts]["escalated"] = True
+        # Fetch messages from Slack
+        messages = fetch_history(client, channel_id, start_ts)
 
-        # Calculate metrics from threads
-        for thread_ts, thread_data in threads.items():
-            if thread_data.get("user_messages", 0) > 1:
-                threads_with_followup += 1
-
-        # Calculate resolution rate (tickets without escalation)
-        resolved = user_tickets - escalations
-        resolution_rate = (resolved / user_tickets * 100) if user_tickets > 0 else 0
-
-        # Count common issues
-        issue_counts = Counter(issue_categories)
-
-        # Estimated response time (bot responds in ~2-3 seconds, manual would be 15-30 min)
-        avg_bot_response_time = 3  # seconds
-        avg_manual_response_time = 20 * 60  # 20 minutes in seconds
-        time_saved_seconds = user_tickets * (avg_manual_response_time - avg_bot_response_time)
-        time_saved_hours = time_saved_seconds / 3600
-
-        return {
-            "period_days": days,
-            "start_date": start_time,
-            "end_date": end_time,
-            "total_tickets": user_tickets,
-            "bot_responses": bot_responses,
-            "escalations": escalations,
-            "resolved": resolved,
-            "resolution_rate": resolution_rate,
-            "common_issues": issue_counts.most_common(5),
-            "avg_response_time": avg_bot_response_time,
-            "time_saved_hours": time_saved_hours,
-            "tickets_with_followup": threads_with_followup,
-            "followup_rate": (threads_with_followup / user_tickets * 100) if user_tickets > 0 else 0
-        }
+        aggregate = aggregate_messages(messages, escalated=escalations.escalated_threads())
+        return build_metrics(aggregate, start_time, end_time, days)
 
     except Exception as e:
         logger.error(f"Error analyzing Slack history: {str(e)}")
         return None
 
+def _aggregate_store():
+    """The shared state store ("daily_aggregate" namespace), importing the legacy JSON cache on first use"""
+    global _migrated
+    if not _migrated:
+        _migrated = True
+        state.import_json_file(DAILY_AGGREGATES_PATH, "daily_aggregate")
+    return state.get_store()
+
+def invalidate_daily_aggregate(channel_id, ts):
+    """Drop the cached aggregate for the day a ticket was posted, e.g. after it is escalated"""
+    day = datetime.fromtimestamp(float(ts)).date()
+    _aggregate_store().delete("daily_aggregate", f"{channel_id}:{day.isoformat()}")
+
+def _day_bounds(day):
+    """Start and end timestamps of a local calendar day"""
+    start = datetime.combine(day, datetime.min.time())
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+def get_daily_aggregates(client, channel_id, start_date, end_date):
+    """Return {date: aggregate} for a date range, fetching only days that aren't cached
+
+    Finished days are cached permanently; today is always recomputed.
+    """
+    store = _aggregate_store()
+    today = datetime.now().date()
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+    result = {}
+    missing = []
+    for day in days:
+        cached = store.get("daily_aggregate", f"{channel_id}:{day.isoformat()}") if day < today else None
+        if cached is not None:
+            result[day] = cached
+        else:
+            missing.append(day)
+
+    # Fetch each contiguous run of missing days with one paginated history scan
+    runs = []
+    for day in missing:
+        if runs and (day - runs[-1][-1]).days == 1:
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+
+    escalated = escalations.escalated_threads() if runs else None
+    for run in runs:
+        oldest, _ = _day_bounds(run[0])
+        _, latest = _day_bounds(run[-1])
+        by_day = {day: [] for day in run}
+        for message in fetch_history(client, channel_id, oldest, latest):
+            day = datetime.fromtimestamp(float(message.get("ts", 0))).date()
+            if day in by_day:
+                by_day[day].append(message)
+
+        for day, messages in by_day.items():
+            aggregate = aggregate_messages(messages, escalated=escalated)
+            result[day] = aggregate
+            if day < today:
+                store.set("daily_aggregate", f"{channel_id}:{day.isoformat()}", aggregate)
+
+    logger.info(f"Daily aggregates: {len(days) - len(missing)} cached, {len(missing)} fetched")
+    return result
+
+def analyze_date_range(client, channel_id, start_date, end_date):
+    """Analyze an inclusive date range by merging cached per-day aggregates"""
+    try:
+        daily = get_daily_aggregates(client, channel_id, start_date, end_date)
+        start_time = datetime.combine(start_date, datetime.min.time())
+        end_time = min(datetime.combine(end_date, datetime.max.time()), datetime.now())
+        days = (end_date - start_date).days + 1
+        metrics = build_metrics(merge_aggregates(daily.values()), start_time, end_time, days)
+        metrics["usage"] = usage.summarize(usage.load_entries(start_time, end_time))
+        return metrics
+
+    except Exception as e:
+        logger.error(f"Error analyzing date range: {str(e)}")
+        return None
+
+_RANGE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})\s*(?:\.\.|to|-|–)\s*(\d{4}-\d{2}-\d{2})")
+_LAST_N_RE = re.compile(r"last\s+(\d+)\s*(day|week|month)s?")
+_SINCE_RE = re.compile(r"since\s+(\d{4}-\d{2}-\d{2})")
+
+REPORT_RANGE_USAGE = "Try 'report last 30 days', 'report last 2 weeks', 'report since 2026-09-01' or 'report 2026-09-01..2026-09-30'."
+
+def _parse_date(value):
+    """Parse a YYYY-MM-DD date from a report request"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{value} isn't a valid date") from None
+
+def parse_report_range(text, default_days=7):
+    """Parse 'last 30 days', 'last 2 weeks', 'since 2026-09-01' or '2026-09-01..2026-09-30'
+
+    Returns an inclusive (start_date, end_date) pair and whether a range was given explicitly.
+    Raises ValueError for impossible dates and ranges that are entirely in the future.
+    """
+    text = text.lower()
+    today = datetime.now().date()
+
+    match = _RANGE_RE.search(text)
+    if match:
+        start = _parse_date(match.group(1))
+        end = _parse_date(match.group(2))
+        start, end = min(start, end), min(max(start, end), today)
+    elif _SINCE_RE.search(text):
+        start = _parse_date(_SINCE_RE.search(text).group(1))
+        end = today
+    elif _LAST_N_RE.search(text):
+        match = _LAST_N_RE.search(text)
+        count = int(match.group(1))
+        if count < 1:
+            raise ValueError("the range must cover at least one day")
+        unit_days = {"day": 1, "week": 7, "month": 30}[match.group(2)]
+        # Clamp before building the timedelta; "last 99999999 days" would overflow it
+        days = min(count * unit_days, MAX_REPORT_DAYS)
+        start, end = today - timedelta(days=days - 1), today
+    elif "last week" in text:
+        start, end = today - timedelta(days=6), today
+    elif "last month" in text:
+        start, end = today - timedelta(days=29), today
+    else:
+        return today - timedelta(days=default_days - 1), today, False
+
+    if start > end:
+        raise ValueError(f"{start.isoformat()} is in the future")
+    if (end - start).days + 1 > MAX_REPORT_DAYS:
+        start = end - timedelta(days=MAX_REPORT_DAYS - 1)
+    return start, end, True
+
+# Checked in order; the first category with a matching keyword wins
+CATEGORY_KEYWORDS = [
+    ("Network/VPN", ["vpn", "connect", "network", "wifi", "internet", "connection"]),
+    ("Authentication/Access", ["okta", "login", "password", "access", "sso", "authenticate", "2fa"]),
+    ("Email", ["email", "gmail", "outlook", "calendar", "mail"]),
+    ("Performance", ["slow", "freeze", "crash", "performance", "hang", "lag"]),
+    ("Software/Apps", ["install", "update", "software", "app", "application"]),
+    ("Device/Hardware", ["device", "laptop", "computer", "mac", "jamf", "hardware"]),
+    ("Access Request", ["access to", "need access", "request access", "permission"]),
+    ("SaaS Access", ["snowflake", "github", "figma", "jira", "aws"]),
+]
+
 def categorize_issue(issue_text):
     """Categorize the issue based on keywords"""
     text = issue_text.lower()
 
-    if any(word in text for word in ["vpn", "connect", "network", "wifi", "internet", "connection"]):
-        return "Network/VPN"
-    elif any(word in text for word in ["okta", "login", "password", "access", "sso", "authenticate", "2fa"]):
-        return "Authentication/Access"
-    elif any(word in text for word in ["email", "gmail", "outlook", "calendar", "mail"]):
-        return "Email"
-    elif any(word in text for word in ["slow", "freeze", "crash", "performance", "hang", "lag"]):
-        return "Performance"
-    elif any(word in text for word in ["install", "update", "software", "app", "application"]):
-        return "Software/Apps"
-    elif any(word in text for word in ["device", "laptop", "computer", "mac", "jamf", "hardware"]):
-        return "Device/Hardware"
-    elif any(word in text for word in ["access to", "need access", "request access", "permission"]):
-        return "Access Request"
-    elif any(word in text for word in ["snowflake", "github", "figma", "jira", "aws"]):
-        return "SaaS Access"
-    else:
-        return "Other"
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(word in text for word in keywords):
+            return category
+    return "Other"
 
 def generate_weekly_report_markdown(metrics):
     """Generate markdown report from metrics"""
@@ -154,8 +348,13 @@ def generate_weekly_report_markdown(metrics):
     start = metrics["start_date"].strftime("%B %d, %Y")
     end = metrics["end_date"].strftime("%B %d, %Y")
 
-    report = f"""# 📊 IT AI Support - Weekly Report
-**Week of {start} - {end}**
+    if metrics["period_days"] == 7:
+        title, period = "Weekly Report", f"Week of {start} - {end}"
+    else:
+        title, period = "Metrics Report", f"{start} - {end} ({metrics['period_days']} days)"
+
+    report = f"""# 📊 IT AI Support - {title}
+**{period}**
 
 ---
 
@@ -217,7 +416,15 @@ def generate_weekly_report_markdown(metrics):
 
 ---
 
-## 💡 Key Insights
+"""
+
+    if metrics.get("usage") is not None:
+        report += generate_cost_section_markdown(metrics["usage"])
+
+    if metrics.get("trend"):
+        report += generate_trend_section_markdown(metrics["trend"])
+
+    report += f"""## 💡 Key Insights
 
 """
 
@@ -276,6 +483,94 @@ def generate_weekly_report_markdown(metrics):
 
     return report
 
+def generate_cost_section_markdown(usage_summary):
+    """Generate the Cost & Tokens report section from a usage summary"""
+    section = "## 💰 Cost & Tokens\n\n"
+    if not usage_summary["tickets"]:
+        return section + "*No model usage recorded for this period.*\n\n---\n\n"
+
+    totals = usage_summary["totals"]
+    section += f"""| Metric | Value |
+|--------|-------|
+| **Model Calls** | {totals['calls']} |
+| **Tickets Using the Model** | {usage_summary['tickets']} |
+| **Prompt Tokens** | {totals['prompt_tokens']:,} ({usage_summary['cache_hit_rate']:.1f}% cached) |
+| **Completion Tokens** | {totals['completion_tokens']:,} |
+| **Estimated Cost** | ${totals['cost']:.4f} |
+| **Avg Tokens per Ticket** | {usage_summary['avg_tokens_per_ticket']:,.0f} |
+| **Avg Cost per Ticket** | ${usage_summary['avg_cost_per_ticket']:.4f} |
+| **Avg Model Calls per Ticket** | {usage_summary['avg_calls_per_ticket']:.1f} |
+| **Model Latency (p50 / p95)** | {usage_summary['latency_p50_ms']:.0f} ms / {usage_summary['latency_p95_ms']:.0f} ms |
+
+### By Category
+
+| Category | Tickets | Avg Tokens | Cost |
+|----------|---------|------------|------|
+"""
+    by_category = sorted(usage_summary["by_category"].items(), key=lambda item: item[1]["cost"], reverse=True)
+    for category, data in by_category:
+        section += f"| {category} | {data['tickets']} | {data['avg_tokens']:,.0f} | ${data['cost']:.4f} |\n"
+
+    section += "\n### By Day\n\n| Day | Calls | Tokens | Cost |\n|-----|-------|--------|------|\n"
+    for day, data in usage_summary["by_day"].items():
+        section += f"| {day} | {data['calls']} | {data['tokens']:,} | ${data['cost']:.4f} |\n"
+
+    if usage_summary["outliers"]:
+        section += "\n### Outliers (more than 2x average tokens)\n\n"
+        for ticket in usage_summary["outliers"]:
+            section += f"- {ticket['day']} - {ticket['category']}: {ticket['tokens']:,} tokens over {ticket['calls']} calls (${ticket['cost']:.4f})\n"
+
+    return section + "\n---\n\n"
+
+def generate_trend_section_markdown(trend):
+    """Generate the 12-month trend report section from the history archive"""
+    section = f"## 📈 {len(trend)}-Month Trend\n\n| Month | Tickets | Escalations | Top Category |\n|-------|---------|-------------|--------------|\n"
+    for month, data in trend.items():
+        top = max(data["categories"].items(), key=lambda item: item[1])[0] if data["categories"] else "-"
+        label = datetime.strptime(month, "%Y-%m").strftime("%b %Y")
+        section += f"| {label} | {data['tickets']} | {data['escalations']} | {top} |\n"
+    return section + "\n---\n\n"
+
+def get_archive_trend(client, channel_id, category=None, months=12):
+    """Monthly counts for the last N months from what is already archived; None if numpy isn't installed
+
+    Missing days are archived in the background (and daily by the scheduler), never inline.
+    """
+    import archive
+
+    if not archive.available():
+        return None
+    try:
+        archive.sync_in_background(client, channel_id)
+        with tracing.span("archive.year_trend", months=months):
+            return archive.year_trend(channel_id, category=category, months=months)
+    except Exception as e:
+        logger.error(f"Error reading history archive: {str(e)}")
+        return None
+
+def generate_trend_summary(client, channel_id, category=None, months=12):
+    """Slack summary of how tickets (optionally one category) trended over the last N months"""
+    trend = get_archive_trend(client, channel_id, category=category, months=months)
+    if trend is None:
+        return None
+
+    subject = f"{category} tickets" if category else "Tickets"
+    if not trend:
+        import archive
+        if archive.archived_until(channel_id) is None:
+            return "📈 The history archive is still being built. Ask again in a few minutes."
+        return f"📈 No archived {subject.lower()} in the last {months} months."
+
+    peak_month, peak = max(trend.items(), key=lambda item: item[1]["tickets"])
+    lines = [f"📈 **{subject}, last {months} months**", ""]
+    for month, data in trend.items():
+        label = datetime.strptime(month, "%Y-%m").strftime("%b %Y")
+        lines.append(f"• {label}: {data['tickets']} ({data['escalations']} escalated)")
+    lines.append("")
+    lines.append(f"Total: {sum(d['tickets'] for d in trend.values())} · Peak: "
+                 f"{datetime.strptime(peak_month, '%Y-%m').strftime('%b %Y')} ({peak['tickets']})")
+    return "\n".join(lines)
+
 def commit_report_to_github(report_content, filename):
     """Commit the report to GitHub"""
     try:
@@ -288,11 +583,12 @@ def commit_report_to_github(report_content, filename):
             f.write(report_content)
 
         # Git commands
-        subprocess.run(["git", "config", "user.email", "bot@theguarantors.com"], check=True)
-        subprocess.run(["git", "config", "user.name", "IT AI Support"], check=True)
-        subprocess.run(["git", "add", filepath], check=True)
-        subprocess.run(["git", "commit", "-m", f"Add weekly metrics report: {filename}"], check=True)
-        subprocess.run(["git", "push", "origin", "main"], check=True)
+        with tracing.span("git.commit_report", filename=filename):
+            subprocess.run(["git", "config", "user.email", "bot@theguarantors.com"], check=True)
+            subprocess.run(["git", "config", "user.name", "IT AI Support"], check=True)
+            subprocess.run(["git", "add", filepath], check=True)
+            subprocess.run(["git", "commit", "-m", f"Add weekly metrics report: {filename}"], check=True)
+            subprocess.run(["git", "push", "origin", "main"], check=True)
 
         logger.info(f"Successfully committed report to GitHub: {filepath}")
         return True
@@ -306,13 +602,20 @@ def generate_and_post_weekly_report(client, channel_id, post_to_slack=True):
     try:
         logger.info("Generating weekly metrics report...")
 
-        # Analyze Slack data
-        metrics = analyze_slack_history(client, channel_id, days=7)
+        # Analyze Slack data from cached daily aggregates (only uncached days are fetched)
+        end_date = datetime.now().date()
+        with tracing.span("metrics.analyze_date_range", days=7):
+            metrics = analyze_date_range(client, channel_id, end_date - timedelta(days=6), end_date)
 
         if not metrics:
             logger.error("Failed to analyze Slack history")
             return False
 
+        # Long-range context from the history archive (skipped without numpy)
+        trend = get_archive_trend(client, channel_id)
+        if trend:
+            metrics["trend"] = trend
+
         # Generate markdown report
         report_md = generate_weekly_report_markdown(metrics)
 
@@ -348,3 +651,27 @@ View full report: https://github.com/TG-orlando/slack-it-chatbot/blob/main/repor
     except Exception as e:
         logger.error(f"Error in generate_and_post_weekly_report: {str(e)}")
         return False
+
+def generate_range_report(client, channel_id, start_date, end_date):
+    """Build an on-demand report for a date range and return a Slack-ready summary, or None"""
+    with tracing.span("metrics.analyze_date_range", days=(end_date - start_date).days + 1):
+        metrics = analyze_date_range(client, channel_id, start_date, end_date)
+
+    if not metrics:
+        logger.error("Failed to analyze date range")
+        return None
+
+    summary = f"""📊 **IT AI Support Report: {start_date.strftime("%b %d, %Y")} - {end_date.strftime("%b %d, %Y")}** ({metrics['period_days']} days)
+
+📈 **Tickets Handled:** {metrics['total_tickets']}
+🔴 **Escalated:** {metrics['escalations']}
+💬 **Required Follow-up:** {metrics['tickets_with_followup']} ({metrics['followup_rate']:.1f}%)
+🎯 **Resolution Rate:** {metrics['resolution_rate']:.1f}%
+⏱️ **Time Saved:** {metrics['time_saved_hours']:.1f} hours
+"""
+    if metrics["common_issues"]:
+        summary += "\n**Most Common Issues:**\n"
+        for i, (category, count) in enumerate(metrics["common_issues"], 1):
+            summary += f"{i}. {category} - {count}\n"
+
+    return summary
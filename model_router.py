@@ -0,0 +1,284 @@
+import os
+import json
+import logging
+import random
+import threading
+import time
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from types import SimpleNamespace
+
+import usage
+
+logger = logging.getLogger(__name__)
+
+# Model options, fastest-first routing and hedged requests
+# MODEL_ROUTES is a JSON list of options; the first is the primary. Each option has a
+# "model" and optionally "base_url" + "api_key_env" (another OpenAI-compatible endpoint),
+# "name", or "fake": {"latency_ms": ..., "jitter_ms": ..., "slow_rate": ..., "slow_ms": ..., "error_rate": ...}
+# for a local endpoint with injected latency. Unset, the caller's model is the only option.
+MODEL_ROUTES = os.environ.get("MODEL_ROUTES")
+HEDGE_ENABLED = os.environ.get("HEDGE_ENABLED", "1").lower() in ("1", "true", "yes")
+HEDGE_MIN_DEADLINE = float(os.environ.get("HEDGE_MIN_DEADLINE", "2"))
+HEDGE_MAX_DEADLINE = float(os.environ.get("HEDGE_MAX_DEADLINE", "20"))
+HEDGE_DEFAULT_DEADLINE = float(os.environ.get("HEDGE_DEFAULT_DEADLINE", "10"))
+LATENCY_WINDOW = int(os.environ.get("LATENCY_WINDOW", "200"))
+LATENCY_MIN_SAMPLES = int(os.environ.get("LATENCY_MIN_SAMPLES", "20"))
+SHORT_MESSAGE_CHARS = int(os.environ.get("SHORT_MESSAGE_CHARS", "160"))
+# Share of short requests sent to options without enough samples yet, so they can warm up
+LATENCY_EXPLORE_RATE = float(os.environ.get("LATENCY_EXPLORE_RATE", "0.1"))
+HEDGE_WORKERS = int(os.environ.get("HEDGE_WORKERS", "16"))
+
+_lock = threading.Lock()
+_latencies = {}
+_counters = {"requests": 0, "fast_routed": 0, "hedges": 0, "hedges_won": 0}
+_options = None
+_clients = {}
+_executor = None
+
+class FakeChatClient:
+    """OpenAI-shaped client that sleeps for an injected latency (and optionally fails); for tests and simulations"""
+
+    def __init__(self, latency_ms=800, jitter_ms=200, slow_rate=0.05, slow_ms=8000, error_rate=0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model=None, messages=None, **kwargs):
+        with _lock:
+            slow = self._random.random() < self.slow_rate
+            delay = self.slow_ms if slow else max(0, self._random.gauss(self.latency_ms, self.jitter_ms))
+            failed = self._random.random() < self.error_rate
+        time.sleep(delay / 1000)
+        if failed:
+            raise RuntimeError(f"injected failure from fake {model}")
+        content = f"[fake {model}] {(messages or [{}])[-1].get('content', '')[:80]}"
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=500, completion_tokens=100, prompt_tokens_details=None),
+        )
+
+def _load_options(default_model):
+    """Parse MODEL_ROUTES once; without it the caller's model is the only option"""
+    global _options
+    if _options is None:
+        options = []
+        if MODEL_ROUTES:
+            try:
+                for option in json.loads(MODEL_ROUTES):
+                    option.setdefault("name", f"{option.get('base_url') or 'openai'}:{option['model']}")
+                    options.append(option)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(f"Ignoring invalid MODEL_ROUTES: {str(e)}")
+                options = []
+        _options = options
+    return _options or [{"name": f"openai:{default_model}", "model": default_model}]
+
+def configure(options):
+    """Replace the model options and reset latency windows and counters (simulator and tests)
+
+    None goes back to MODEL_ROUTES.
+    """
+    global _options
+    with _lock:
+        _options = None if options is None else [
+            dict(option, name=option.get("name") or f"{option.get('base_url') or 'openai'}:{option['model']}")
+            for option in options
+        ]
+        _clients.clear()
+        _latencies.clear()
+        for key in _counters:
+            _counters[key] = 0
+
+def _client_for(option, default_client_factory):
+    """The client serving an option, built once"""
+    name = option["name"]
+    client = _clients.get(name)
+    if client is None:
+        if option.get("fake") is not None:
+            client = FakeChatClient(**option["fake"])
+        elif option.get("base_url"):
+            from openai import OpenAI
+            client = OpenAI(base_url=option["base_url"], api_key=os.environ.get(option.get("api_key_env", "OPENAI_API_KEY")))
+        else:
+            client = default_client_factory()
+        _clients[name] = client
+    return client
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="model-call")
+    return _executor
+
+def record_latency(name, seconds):
+    """Add a completed call to the option's rolling latency window"""
+    with _lock:
+        window = _latencies.get(name)
+        if window is None:
+            window = _latencies[name] = deque(maxlen=LATENCY_WINDOW)
+        window.append(seconds)
+
+def percentile(name, pct):
+    """Rolling latency percentile in seconds, or None until enough samples are in"""
+    with _lock:
+        window = list(_latencies.get(name, ()))
+    if len(window) < LATENCY_MIN_SAMPLES:
+        return None
+    return usage._percentile(window, pct)
+
+def hedge_deadline(name):
+    """How long to wait on an option before firing a duplicate: its p95, clamped"""
+    p95 = percentile(name, 95)
+    if p95 is None:
+        return HEDGE_DEFAULT_DEADLINE
+    return min(max(p95, HEDGE_MIN_DEADLINE), HEDGE_MAX_DEADLINE)
+
+def is_short(messages):
+    """Short, simple exchanges: a brief latest user message early in the conversation"""
+    user_messages = [m for m in messages if m.get("role") == "user"]
+    if not user_messages:
+        return False
+    return len(user_messages[-1].get("content") or "") <= SHORT_MESSAGE_CHARS and len(user_messages) <= 2
+
+def choose(messages, default_model):
+    """Pick the primary option and the hedge target for a request"""
+    options = _load_options(default_model)
+    primary = options[0]
+    if len(options) > 1 and is_short(messages):
+        cold = [option for option in options if percentile(option["name"], 50) is None]
+        warm = [option for option in options if option not in cold]
+        if cold and (not warm or random.random() < LATENCY_EXPLORE_RATE):
+            primary = random.choice(cold)
+        elif warm:
+            primary = min(warm, key=lambda option: percentile(option["name"], 50))
+        if primary is not options[0]:
+            with _lock:
+                _counters["fast_routed"] += 1
+    others = [option for option in options if option is not primary]
+    return primary, (others[0] if others else primary)
+
+def _call(option, default_client_factory, kwargs):
+    """One completion attempt; returns (option, response, latency)"""
+    client = _client_for(option, default_client_factory)
+    started = time.perf_counter()
+    response = client.chat.completions.create(**dict(kwargs, model=option["model"]))
+    latency = time.perf_counter() - started
+    record_latency(option["name"], latency)
+    return option, response, latency
+
+def complete(default_client_factory, on_discarded=None, hedge=None, **kwargs):
+    """Run a chat completion on the best option, hedging once if it passes its p95 deadline
+
+    Returns (response, model, latency) from whichever attempt answers first. The losing
+    attempt can't be cancelled mid-flight; on_discarded(model, response, latency) is called
+    when it finishes so its tokens can still be accounted for. hedge overrides HEDGE_ENABLED.
+    """
+    primary, backup = choose(kwargs.get("messages") or [], kwargs.get("model"))
+    with _lock:
+        _counters["requests"] += 1
+    if not (HEDGE_ENABLED if hedge is None else hedge):
+        option, response, latency = _call(primary, default_client_factory, kwargs)
+        return response, option["model"], latency
+
+    executor = _get_executor()
+    started = time.perf_counter()
+    first = executor.submit(contextvars.copy_context().run, _call, primary, default_client_factory, kwargs)
+    done, _ = wait([first], timeout=hedge_deadline(primary["name"]))
+    if done:
+        option, response, latency = first.result()
+        return response, option["model"], latency
+
+    logger.info(f"Hedging {primary['name']} after {time.perf_counter() - started:.1f}s with {backup['name']}")
+    with _lock:
+        _counters["hedges"] += 1
+    hedged = executor.submit(contextvars.copy_context().run, _call, backup, default_client_factory, kwargs)
+    pending = {first, hedged}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                option, response, _ = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is hedged:
+                with _lock:
+                    _counters["hedges_won"] += 1
+            for loser in (done | pending) - {future}:
+                loser.add_done_callback(lambda f: _discard(f, on_discarded))
+            return response, option["model"], time.perf_counter() - started
+    raise error
+
+def _discard(future, on_discarded):
+    """Account for a hedged attempt that finished after the winner"""
+    if on_discarded is None or future.exception() is not None:
+        return
+    option, response, latency = future.result()
+    try:
+        on_discarded(option["model"], response, latency)
+    except Exception as e:
+        logger.error(f"Error recording discarded completion: {str(e)}")
+
+def stats():
+    """Per-option latency percentiles plus routing and hedge counts"""
+    with _lock:
+        names = list(_latencies)
+        counters = dict(_counters)
+    options = {}
+    for name in names:
+        with _lock:
+            samples = len(_latencies[name])
+        p50, p95 = percentile(name, 50), percentile(name, 95)
+        options[name] = {
+            "samples": samples,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+    return dict(counters, options=options)
+
+def simulate(requests=200, concurrency=8, hedging=True):
+    """Drive fake endpoints with injected latency and report end-to-end percentiles
+
+    Replaces the configured options and counters for this process; meant for the CLI.
+    """
+    configure([
+        {"name": "fake-primary", "model": "gpt-4o-mini",
+         "fake": {"latency_ms": 900, "jitter_ms": 250, "slow_rate": 0.04, "slow_ms": 6000, "seed": 1}},
+        {"name": "fake-fast", "model": "gpt-4o-mini",
+         "fake": {"latency_ms": 500, "jitter_ms": 150, "slow_rate": 0.04, "slow_ms": 6000, "seed": 2}},
+    ])
+    rng = random.Random(0)
+    prompts = ["thanks, VPN works now?", "My laptop won't boot after the update. " * 8]
+
+    def one(i):
+        messages = [{"role": "system", "content": "IT support"}, {"role": "user", "content": rng.choice(prompts)}]
+        _, _, latency = complete(lambda: None, hedge=hedging, model="gpt-4o-mini", messages=messages)
+        return latency
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    result = stats()
+    result["end_to_end_p50_ms"] = round(usage._percentile(latencies, 50) * 1000, 1)
+    result["end_to_end_p95_ms"] = round(usage._percentile(latencies, 95) * 1000, 1)
+    result["end_to_end_max_ms"] = round(max(latencies) * 1000, 1)
+    return result
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulate model routing and hedging against fake endpoints")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--no-hedge", action="store_true", help="disable hedging for a baseline run")
+    args = parser.parse_args()
+    print(json.dumps(simulate(args.requests, args.concurrency, not args.no_hedge), indent=2))
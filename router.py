@@ -0,0 +1,154 @@
+import logging
+import re
+from collections import Counter
+
+import metrics
+import state
+
+logger = logging.getLogger(__name__)
+
+# Routes
+ACCESS_REQUEST = "access_request"
+CHANGE_REQUEST = "change_request"
+THANKS = "thanks"
+TROUBLESHOOT = "troubleshoot"
+
+TEMPLATED_ROUTES = (ACCESS_REQUEST, CHANGE_REQUEST, THANKS)
+
+# Simple completion phrases (short, standalone thank you messages)
+SIMPLE_COMPLETIONS = [
+    "thank you", "thanks", "thanks!", "thank you!", "ty", "thx",
+    "got it", "got it!", "all good", "all set", "perfect", "awesome",
+    "works now", "working now", "it works", "that worked", "fixed it",
+    "resolved", "sorted", "done", "completed", "solved"
+]
+
+# Words that mean a "thanks" still has an open issue attached
+CONTINUATION_WORDS = ["but", "however", "still", "although", "though", "except",
+                      "issue", "problem", "not", "doesn't", "don't", "can't", "won't",
+                      "half", "part", "other", "another", "also", "and"]
+
+# Matched on word boundaries, so "ty" doesn't match "security" and "done" doesn't match "abandoned"
+def _words_re(phrases):
+    """One precompiled pattern matching any of the phrases as whole words"""
+    return re.compile(r"\b(?:" + "|".join(re.escape(p.rstrip("!")) for p in phrases) + r")\b")
+
+_COMPLETION_RE = _words_re(SIMPLE_COMPLETIONS)
+_CONTINUATION_RE = _words_re(CONTINUATION_WORDS)
+
+# A new top-level ticket is only a thank-you when that is all it says
+THANK_YOU_PHRASES = {"thank you", "thanks", "ty", "thx", "thank you so much", "thanks so much",
+                     "thanks a lot", "many thanks", "thanks again", "thank you again"}
+THANK_YOU_ADDRESSEES = {"team", "all", "everyone", "guys", "folks", "it"}
+_PUNCTUATION_RE = re.compile(r"[^\w\s']+")
+
+# Change requests (not a technical issue)
+CHANGE_KEYWORDS = ["change", "update my", "modify", "edit my", "adjust", "configure",
+                   "set up", "setup", "install", "add me", "remove me", "switch",
+                   "device", "settings", "preferences", "configuration"]
+
+# Access requests reuse the report categories' access and SaaS keyword lists
+_CATEGORY_KEYWORDS = dict(metrics.CATEGORY_KEYWORDS)
+ACCESS_REQUEST_KEYWORDS = _CATEGORY_KEYWORDS["Access Request"] + ["get access", "give me access", "add me to",
+                                                                   "invite me to", "send me an invite"]
+SAAS_KEYWORDS = _CATEGORY_KEYWORDS["SaaS Access"]
+
+# "Invite" and "license" alone show up in problems too ("my Adobe license says..."), so only request phrasing counts
+_LICENSE_REQUEST_RE = re.compile(r"\bneed an?\s+(?:[\w-]+\s+){0,2}licen[cs]e\b")
+
+# The SaaS name must be what is being asked for: "Can I get Figma?", "I need Snowflake access",
+# "need a seat in GitHub" - not "can I get help with GitHub"
+_SAAS_REQUEST_RE = re.compile(
+    r"\b(?:can i (?:get|have)|could i (?:get|have)|request|add me to|give me|need)\s+"
+    r"(?:access to\s+|an?\s+|(?:a seat|an account)\s+(?:in|on|for)\s+)?"
+    r"(?:" + "|".join(re.escape(app) for app in SAAS_KEYWORDS) + r")\b"
+)
+
+# Signs that an access-flavored message is really something broken
+TROUBLE_WORDS = ["can't", "cannot", "can not", "unable", "error", "errors", "not working", "doesn't",
+                 "isn't", "is not", "not syncing", "not showing", "broken", "locked", "reset", "expired",
+                 "fail", "fails", "failed", "failing", "failure", "lost", "denied", "won't",
+                 "hang", "hangs", "hanging", "stuck", "wrong", "missing"]
+_TROUBLE_RE = _words_re(TROUBLE_WORDS)
+
+ACCESS_REQUEST_RESPONSE = "Thank you for your access request! TheGuarantors IT team is provisioning your access and will follow up shortly."
+THANKS_RESPONSE = "You're welcome! Glad we could help. If you need anything else, feel free to post a new message in this channel. Have a great day!"
+
+
+def is_simple_completion(message):
+    """Check for a CLEAR completion message (short, no "but" or continuation)"""
+    message_lower = message.lower().strip()
+    return (
+        any(message_lower == phrase or message_lower == phrase + "!" for phrase in SIMPLE_COMPLETIONS) or
+        (len(message_lower.split()) <= 5 and
+         _COMPLETION_RE.search(message_lower) is not None and
+         _CONTINUATION_RE.search(message_lower) is None)
+    )
+
+def is_thank_you(message):
+    """Check for a standalone thank-you ("Thanks!", "thank you so much team 🙏"), ignoring punctuation and emoji"""
+    words = _PUNCTUATION_RE.sub(" ", message.lower()).split()
+    if words and words[-1] in THANK_YOU_ADDRESSEES:
+        words = words[:-1]
+    return " ".join(words) in THANK_YOU_PHRASES
+
+def is_change_request(message):
+    """Check whether a new ticket is a change request rather than a technical issue"""
+    message_lower = message.lower()
+    return any(keyword in message_lower for keyword in CHANGE_KEYWORDS)
+
+def is_access_request(message):
+    """Check whether a new ticket is asking for access rather than reporting a problem"""
+    message_lower = message.lower()
+    if _TROUBLE_RE.search(message_lower):
+        return False
+    if any(keyword in message_lower for keyword in ACCESS_REQUEST_KEYWORDS):
+        return True
+    return bool(_LICENSE_REQUEST_RE.search(message_lower) or _SAAS_REQUEST_RE.search(message_lower))
+
+def _record(route, source):
+    """Count a routing decision (shared across worker processes)"""
+    state.get_store().incr("routing", f"{source}:{route}")
+    logger.info(f"Routed {source} message to {route}")
+
+def route_new_ticket(message):
+    """Route a new top-level ticket; only TROUBLESHOOT needs a model call"""
+    if is_thank_you(message):
+        route = THANKS
+    elif is_access_request(message):
+        route = ACCESS_REQUEST
+    elif is_change_request(message):
+        route = CHANGE_REQUEST
+    else:
+        route = TROUBLESHOOT
+    _record(route, "ticket")
+    return route
+
+def route_followup(message):
+    """Route a follow-up from the ticket creator; only TROUBLESHOOT needs a model call"""
+    route = THANKS if is_simple_completion(message) else TROUBLESHOOT
+    _record(route, "followup")
+    return route
+
+def change_request_response(assignee_mention=None):
+    """Acknowledgment for change requests, naming the assignee when known"""
+    if assignee_mention:
+        return f"Thank you! We have received your request. {assignee_mention} is working on this and will reach out shortly."
+    return "Thank you! We have received your request. Our IT team is working on this and will reach out shortly."
+
+def stats():
+    """Routing decision counts and how many model calls they avoided"""
+    decisions = dict(state.get_store().items("routing"))
+    by_route = Counter()
+    for key, count in decisions.items():
+        by_route[key.split(":", 1)[1]] += count
+    total = sum(by_route.values())
+    avoided = sum(count for route, count in by_route.items() if route in TEMPLATED_ROUTES)
+    return {
+        "total": total,
+        "model_calls": by_route[TROUBLESHOOT],
+        "model_calls_avoided": avoided,
+        "avoided_rate": (avoided / total * 100) if total > 0 else 0,
+        "by_route": dict(by_route),
+        "by_source": decisions,
+    }
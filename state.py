@@ -0,0 +1,219 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "sqlite").lower()
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", os.path.join(DATA_DIR, "state.db"))
+
+class StateStore:
+    """Key/value state shared by the bot's handlers, grouped by namespace
+
+    Values must be JSON-serializable. Namespaces given max_entries keep only the
+    most recently written keys.
+    """
+
+    # True when other processes may write to the same state, so waiters must poll
+    shared = False
+
+    def get(self, namespace, key, default=None):
+        raise NotImplementedError()
+
+    def set(self, namespace, key, value, max_entries=None):
+        raise NotImplementedError()
+
+    def add(self, namespace, key, value, max_entries=None):
+        """Set a key only if it is absent; returns True if it was added"""
+        raise NotImplementedError()
+
+    def delete(self, namespace, key):
+        raise NotImplementedError()
+
+    def items(self, namespace):
+        """All (key, value) pairs in a namespace, oldest write first"""
+        raise NotImplementedError()
+
+    def incr(self, namespace, key, amount=1):
+        """Atomically add to a counter and return the new value"""
+        raise NotImplementedError()
+
+class MemoryStateStore(StateStore):
+    """Process-local state; nothing survives a restart"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _namespace(self, namespace):
+        return self._data.setdefault(namespace, OrderedDict())
+
+    def _put(self, namespace, key, value, max_entries):
+        data = self._namespace(namespace)
+        data[key] = value
+        data.move_to_end(key)
+        if max_entries:
+            while len(data) > max_entries:
+                data.popitem(last=False)
+
+    def get(self, namespace, key, default=None):
+        with self._lock:
+            return self._namespace(namespace).get(key, default)
+
+    def set(self, namespace, key, value, max_entries=None):
+        with self._lock:
+            self._put(namespace, key, value, max_entries)
+
+    def add(self, namespace, key, value, max_entries=None):
+        with self._lock:
+            if key in self._namespace(namespace):
+                return False
+            self._put(namespace, key, value, max_entries)
+            return True
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._namespace(namespace).pop(key, None)
+
+    def items(self, namespace):
+        with self._lock:
+            return list(self._namespace(namespace).items())
+
+    def incr(self, namespace, key, amount=1):
+        with self._lock:
+            value = self._namespace(namespace).get(key, 0) + amount
+            self._namespace(namespace)[key] = value
+            return value
+
+class SQLiteStateStore(StateStore):
+    """State in a local SQLite file, shared by every worker process on the box"""
+
+    shared = True
+    PRUNE_EVERY = 100
+
+    def __init__(self, path=STATE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS state_updated ON state (namespace, updated)")
+
+    def _conn(self):
+        """One connection per thread; SQLite handles cross-process locking"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _prune(self, namespace, max_entries):
+        """Trim a namespace to its newest max_entries keys every so often"""
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY:
+            return
+        self._conn().execute(
+            """DELETE FROM state WHERE namespace = ? AND key IN (
+                   SELECT key FROM state WHERE namespace = ? ORDER BY updated DESC LIMIT -1 OFFSET ?
+               )""",
+            (namespace, namespace, max_entries)
+        )
+
+    def get(self, namespace, key, default=None):
+        row = self._conn().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, namespace, key, value, max_entries=None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO state (namespace, key, value, updated) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), time.time())
+        )
+        if max_entries:
+            self._prune(namespace, max_entries)
+
+    def add(self, namespace, key, value, max_entries=None):
+        cursor = self._conn().execute(
+            "INSERT OR IGNORE INTO state (namespace, key, value, updated) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), time.time())
+        )
+        if cursor.rowcount and max_entries:
+            self._prune(namespace, max_entries)
+        return bool(cursor.rowcount)
+
+    def delete(self, namespace, key):
+        self._conn().execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def items(self, namespace):
+        rows = self._conn().execute(
+            "SELECT key, value FROM state WHERE namespace = ? ORDER BY updated", (namespace,)
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def incr(self, namespace, key, amount=1):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            value = (json.loads(row[0]) if row else 0) + amount
+            conn.execute(
+                "INSERT OR REPLACE INTO state (namespace, key, value, updated) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Return the configured state store (STATE_BACKEND=sqlite|memory)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if STATE_BACKEND == "memory":
+                    _store = MemoryStateStore()
+                else:
+                    _store = SQLiteStateStore()
+                logger.info(f"Using {type(_store).__name__} for shared state")
+    return _store
+
+def import_json_file(path, namespace, max_entries=None):
+    """One-time migration of a legacy JSON state file into a namespace"""
+    store = get_store()
+    if store.items(namespace) or not os.path.exists(path):
+        return 0
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.error(f"Error importing {path}: {str(e)}")
+        return 0
+    for key, value in data.items():
+        store.set(namespace, key, value, max_entries=max_entries)
+    os.replace(path, f"{path}.imported")
+    logger.info(f"Imported {len(data)} entries from {path} into {namespace} state")
+    return len(data)
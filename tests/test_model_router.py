@@ -0,0 +1,130 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STATE_BACKEND", "memory")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="it-bot-test-"))
+
+import model_router  # noqa: E402
+
+SHORT = [{"role": "system", "content": "IT support"}, {"role": "user", "content": "VPN works now?"}]
+LONG = [{"role": "system", "content": "IT support"}, {"role": "user", "content": "My laptop won't boot. " * 20}]
+
+def fake(name, model, **latency):
+    """A fake endpoint option with fixed injected latency"""
+    return {"name": name, "model": model, "fake": dict({"jitter_ms": 0, "slow_rate": 0}, **latency)}
+
+def no_client():
+    raise AssertionError("fake options never use the default client")
+
+class ModelRouterTest(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(model_router, "LATENCY_MIN_SAMPLES", 5),
+            mock.patch.object(model_router, "LATENCY_EXPLORE_RATE", 0),
+            mock.patch.object(model_router, "HEDGE_MIN_DEADLINE", 0.05),
+            mock.patch.object(model_router, "HEDGE_DEFAULT_DEADLINE", 0.1),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(model_router.configure, None)
+
+    def warm(self, name, seconds):
+        for _ in range(model_router.LATENCY_MIN_SAMPLES):
+            model_router.record_latency(name, seconds)
+
+    def test_short_messages_go_to_fastest_option(self):
+        model_router.configure([fake("primary", "model-a", latency_ms=5), fake("fast", "model-b", latency_ms=5)])
+        self.warm("primary", 0.8)
+        self.warm("fast", 0.2)
+
+        primary, backup = model_router.choose(SHORT, "model-a")
+        self.assertEqual(primary["name"], "fast")
+        self.assertEqual(backup["name"], "primary")
+
+        response, model, _ = model_router.complete(no_client, hedge=False, model="model-a", messages=SHORT)
+        self.assertEqual(model, "model-b")
+        self.assertIn("[fake model-b]", response.choices[0].message.content)
+        self.assertEqual(model_router.stats()["fast_routed"], 2)
+
+    def test_long_messages_stay_on_primary(self):
+        model_router.configure([fake("primary", "model-a", latency_ms=5), fake("fast", "model-b", latency_ms=5)])
+        self.warm("primary", 0.8)
+        self.warm("fast", 0.2)
+
+        primary, _ = model_router.choose(LONG, "model-a")
+        self.assertEqual(primary["name"], "primary")
+
+    def test_hedge_fires_after_deadline_and_first_answer_wins(self):
+        model_router.configure([
+            fake("primary", "model-a", latency_ms=600),
+            fake("backup", "model-b", latency_ms=20),
+        ])
+        self.warm("primary", 0.01)
+        self.assertEqual(model_router.hedge_deadline("primary"), 0.05)
+
+        discarded = []
+        finished = threading.Event()
+
+        def on_discarded(model, response, latency):
+            discarded.append((model, latency))
+            finished.set()
+
+        started = time.perf_counter()
+        response, model, latency = model_router.complete(
+            no_client, on_discarded=on_discarded, hedge=True, model="model-a", messages=LONG
+        )
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(model, "model-b")
+        self.assertIn("[fake model-b]", response.choices[0].message.content)
+        self.assertLess(elapsed, 0.5)
+        self.assertLess(latency, 0.5)
+        stats = model_router.stats()
+        self.assertEqual(stats["hedges"], 1)
+        self.assertEqual(stats["hedges_won"], 1)
+
+        # The slow primary still finishes and is reported, not dropped
+        self.assertTrue(finished.wait(3))
+        self.assertEqual(discarded[0][0], "model-a")
+        self.assertGreaterEqual(discarded[0][1], 0.5)
+
+    def test_no_hedge_before_deadline(self):
+        model_router.configure([fake("primary", "model-a", latency_ms=5), fake("backup", "model-b", latency_ms=5)])
+
+        _, model, _ = model_router.complete(no_client, hedge=True, model="model-a", messages=LONG)
+        self.assertEqual(model, "model-a")
+        self.assertEqual(model_router.stats()["hedges"], 0)
+
+    def test_failed_primary_falls_back_to_hedge(self):
+        model_router.configure([
+            fake("primary", "model-a", latency_ms=300, error_rate=1),
+            fake("backup", "model-b", latency_ms=400),
+        ])
+
+        _, model, _ = model_router.complete(no_client, hedge=True, model="model-a", messages=LONG)
+        self.assertEqual(model, "model-b")
+
+    def test_error_when_both_attempts_fail(self):
+        model_router.configure([
+            fake("primary", "model-a", latency_ms=200, error_rate=1),
+            fake("backup", "model-b", latency_ms=50, error_rate=1),
+        ])
+        discarded = []
+
+        with self.assertRaises(RuntimeError):
+            model_router.complete(
+                no_client, on_discarded=lambda *args: discarded.append(args), hedge=True,
+                model="model-a", messages=LONG
+            )
+        self.assertEqual(model_router.stats()["hedges"], 1)
+        self.assertEqual(discarded, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STATE_BACKEND", "memory")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="it-bot-test-"))
+
+import router  # noqa: E402
+
+ACCESS_REQUESTS = [
+    "I need access to Snowflake",
+    "I need Snowflake access",
+    "Need access to Figma for a project",
+    "Can I get Figma?",
+    "Could you add me to the #eng-oncall channel?",
+    "Please invite me to the Jira board",
+    "I need a seat in GitHub",
+    "I need a Figma license",
+]
+
+NOT_ACCESS_REQUESTS = [
+    "Calendar invite from Gmail not syncing",
+    "Zoom invite isn't showing up on my calendar",
+    "My Adobe license says it is for the wrong team",
+    "can i get help with github, pushes hang",
+    "I can't access Snowflake",
+    "Getting permission denied on the shared drive",
+    "My laptop won't boot",
+]
+
+class AccessRequestTest(unittest.TestCase):
+    def test_access_requests(self):
+        for message in ACCESS_REQUESTS:
+            with self.subTest(message=message):
+                self.assertTrue(router.is_access_request(message))
+
+    def test_problems_are_not_access_requests(self):
+        for message in NOT_ACCESS_REQUESTS:
+            with self.subTest(message=message):
+                self.assertFalse(router.is_access_request(message))
+
+    def test_route_new_ticket(self):
+        self.assertEqual(router.route_new_ticket("I need Snowflake access"), router.ACCESS_REQUEST)
+        self.assertEqual(router.route_new_ticket("Zoom invite isn't showing up on my calendar"), router.TROUBLESHOOT)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+TICKET_QUEUE_PATH = os.environ.get("TICKET_QUEUE_PATH", os.path.join(DATA_DIR, "tickets.db"))
+MAX_ATTEMPTS = int(os.environ.get("TICKET_QUEUE_MAX_ATTEMPTS", "3"))
+DONE_RETENTION_SECONDS = 24 * 60 * 60
+
+_lock = threading.Condition()
+_conn = None
+_stopping = threading.Event()
+_workers = []
+_in_flight = 0
+_completed_since_prune = 0
+
+def _connect():
+    """Open the queue database once; all access is serialized through _lock"""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(TICKET_QUEUE_PATH) or ".", exist_ok=True)
+        _conn = sqlite3.connect(TICKET_QUEUE_PATH, timeout=10, check_same_thread=False, isolation_level=None)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS tickets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id TEXT UNIQUE,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                owner INTEGER
+            )
+        """)
+        columns = [row[1] for row in _conn.execute("PRAGMA table_info(tickets)")]
+        if "owner" not in columns:
+            _conn.execute("ALTER TABLE tickets ADD COLUMN owner INTEGER")
+        _conn.execute("CREATE INDEX IF NOT EXISTS tickets_status ON tickets (status, id)")
+    return _conn
+
+def enqueue(event_id, kind, payload):
+    """Durably record an accepted event; duplicates (Slack retries) are ignored"""
+    now = time.time()
+    with _lock:
+        cursor = _connect().execute(
+            "INSERT OR IGNORE INTO tickets (event_id, kind, payload, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (event_id, kind, json.dumps(payload), now, now)
+        )
+        if cursor.rowcount:
+            _lock.notify()
+            return cursor.lastrowid
+    return None
+
+def _claim():
+    """Mark the oldest pending entry in progress and return (id, kind, payload, attempts) (caller holds _lock)
+
+    The claim is one write transaction so worker processes sharing the file never
+    take the same entry.
+    """
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT id, kind, payload, attempts FROM tickets WHERE status = 'pending' ORDER BY id LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE tickets SET status = 'in_progress', attempts = attempts + 1, updated = ?, owner = ? WHERE id = ?",
+                (time.time(), os.getpid(), row[0])
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if row is None:
+        return None
+    return row[0], row[1], json.loads(row[2]), row[3] + 1
+
+def _finish(ticket_id, status):
+    """Record the outcome of a processed entry"""
+    global _completed_since_prune
+    with _lock:
+        _connect().execute(
+            "UPDATE tickets SET status = ?, updated = ? WHERE id = ?",
+            (status, time.time(), ticket_id)
+        )
+        _completed_since_prune += 1
+        if _completed_since_prune >= 100:
+            _prune()
+
+def _prune():
+    """Drop finished entries once they are too old to be useful for dedupe (caller holds _lock)"""
+    global _completed_since_prune
+    _conn.execute(
+        "DELETE FROM tickets WHERE status IN ('done', 'failed') AND updated < ?",
+        (time.time() - DONE_RETENTION_SECONDS,)
+    )
+    _completed_since_prune = 0
+
+def _owner_alive(pid):
+    """Whether the process that claimed an entry is still running (never us: we haven't claimed yet)"""
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def recover():
+    """Requeue entries left in progress by a dead process; give up after MAX_ATTEMPTS
+
+    Entries claimed by sibling worker processes that are still running are left alone.
+    """
+    with _lock:
+        conn = _connect()
+        rows = conn.execute(
+            "SELECT id, attempts, owner FROM tickets WHERE status = 'in_progress'"
+        ).fetchall()
+        requeued = 0
+        for ticket_id, attempts, owner in rows:
+            if _owner_alive(owner):
+                continue
+            status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+            conn.execute(
+                "UPDATE tickets SET status = ?, updated = ?, owner = NULL WHERE id = ?",
+                (status, time.time(), ticket_id)
+            )
+            requeued += status == "pending"
+        pending = conn.execute("SELECT COUNT(*) FROM tickets WHERE status = 'pending'").fetchone()[0]
+        _prune()
+    if pending:
+        logger.info(f"Replaying {pending} unfinished ticket(s) from the queue ({requeued} were in flight at shutdown)")
+    return pending
+
+def pending_count():
+    """Number of entries waiting for a worker"""
+    with _lock:
+        return _connect().execute("SELECT COUNT(*) FROM tickets WHERE status = 'pending'").fetchone()[0]
+
+def _worker(process):
+    """Drain the queue until shutdown is requested"""
+    global _in_flight
+    while True:
+        with _lock:
+            entry = None
+            while not _stopping.is_set():
+                entry = _claim()
+                if entry:
+                    break
+                _lock.wait(1)
+            if entry is None:
+                return
+            _in_flight += 1
+
+        ticket_id, kind, payload, attempts = entry
+        status = "done"
+        try:
+            # A second attempt means an earlier process may have got part way through
+            process(kind, payload, replayed=attempts > 1)
+        except Exception as e:
+            status = "failed"
+            logger.error(f"Error processing queued {kind} {ticket_id}: {str(e)}")
+        finally:
+            _finish(ticket_id, status)
+            with _lock:
+                _in_flight -= 1
+                _lock.notify_all()
+
+def start_workers(count, process):
+    """Start worker threads that call process(kind, payload, replayed=...) for each queued entry"""
+    _stopping.clear()
+    for i in range(count):
+        thread = threading.Thread(target=_worker, args=(process,), name=f"ticket-worker-{i}", daemon=True)
+        thread.start()
+        _workers.append(thread)
+    logger.info(f"Started {count} ticket queue worker(s)")
+
+def drain(deadline_seconds):
+    """Stop taking new entries and wait for in-flight ones; returns True if all finished in time"""
+    _stopping.set()
+    deadline = time.monotonic() + deadline_seconds
+    with _lock:
+        _lock.notify_all()
+        while _in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _lock.wait(remaining)
+        unfinished = _in_flight
+    if unfinished:
+        logger.warning(f"Shutdown deadline reached with {unfinished} ticket(s) in flight; they will be replayed on boot")
+        return False
+    logger.info("Ticket queue drained")
+    return True
+
+def close():
+    """Close the queue database"""
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
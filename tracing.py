@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import logging
+import random
+import signal
+import threading
+import time
+import uuid
+import functools
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1.0"))
+LOG_MESSAGE_BODIES = os.environ.get("LOG_MESSAGE_BODIES", "").lower() in ("1", "true", "yes")
+PROFILER = os.environ.get("PROFILER", "cprofile").lower()
+PROFILE_OUTPUT = os.environ.get("PROFILE_OUTPUT", "/tmp/it-ai-support.prof")
+SAMPLING_INTERVAL = float(os.environ.get("PROFILE_SAMPLING_INTERVAL", "0.005"))
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+# Trace context
+
+def new_trace(kind, sampled=None):
+    """Start a new trace for an incoming event and make it current"""
+    if sampled is None:
+        sampled = random.random() < TRACE_SAMPLE_RATE
+    trace = {"trace_id": uuid.uuid4().hex[:16], "kind": kind, "sampled": sampled}
+    return _trace.set(trace)
+
+def end_trace(token):
+    """Restore the trace context that was current before new_trace"""
+    _trace.reset(token)
+
+def current_trace_id():
+    """Return the current trace ID, or '-' outside a trace"""
+    trace = _trace.get()
+    return trace["trace_id"] if trace else "-"
+
+def traced(kind):
+    """Decorator that runs a Slack handler or job inside its own trace"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = new_trace(kind)
+            if "client" in kwargs:
+                kwargs["client"] = traced_client(kwargs["client"])
+            if "say" in kwargs and not isinstance(kwargs["say"], _TracedCallable):
+                kwargs["say"] = _TracedCallable("slack.say", kwargs["say"])
+            try:
+                with span(f"handler.{kind}"):
+                    profiler = _profiler
+                    if isinstance(profiler, HandlerProfiler):
+                        return profiler.runcall(func, *args, **kwargs)
+                    return func(*args, **kwargs)
+            finally:
+                end_trace(token)
+        return wrapper
+    return decorator
+
+def run_in_thread(target, *args):
+    """Start a daemon thread that inherits the current trace"""
+    ctx = contextvars.copy_context()
+    thread = threading.Thread(target=ctx.run, args=(target, *args), daemon=True)
+    thread.start()
+    return thread
+
+@contextmanager
+def span(name, **attrs):
+    """Time an operation; logged when the trace is sampled or the operation fails"""
+    trace = _trace.get()
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if status == "error" or (trace and trace["sampled"]) or (trace is None and TRACE_SAMPLE_RATE >= 1):
+            record = {"span": name, "duration_ms": round(duration_ms, 1), "status": status}
+            record.update(attrs)
+            logger.info(f"span {name} {duration_ms:.1f}ms {status}", extra={"span_data": record})
+
+def redact(text):
+    """Hide message bodies in logs unless LOG_MESSAGE_BODIES is set"""
+    if LOG_MESSAGE_BODIES or text is None:
+        return text
+    return f"<redacted {len(text)} chars>"
+
+# Logging
+
+class TraceFilter(logging.Filter):
+    """Attach the current trace ID to every log record"""
+    def filter(self, record):
+        record.trace_id = current_trace_id()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per log line"""
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "message": record.getMessage(),
+        }
+        span_data = getattr(record, "span_data", None)
+        if span_data:
+            payload.update(span_data)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+def configure_logging(level=logging.INFO):
+    """Configure root logging with trace IDs, as text or JSON (LOG_FORMAT=json)"""
+    handler = logging.StreamHandler()
+    handler.addFilter(TraceFilter())
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:[%(trace_id)s] %(message)s"))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+# On-demand profiling
+
+class SamplingProfiler:
+    """Low-overhead profiler that periodically samples every thread's current stack"""
+    def __init__(self, interval=SAMPLING_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < 8:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.samples[" <- ".join(stack)] += 1
+
+    def stop(self, path):
+        self._stop.set()
+        self._thread.join()
+        total = sum(self.samples.values()) or 1
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common(50):
+                f.write(f"{count:6d} {count / total * 100:5.1f}%  {stack}\n")
+
+class HandlerProfiler:
+    """Runs each traced handler call under cProfile and merges the results"""
+    def __init__(self):
+        self.stats = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        pass
+
+    def runcall(self, func, *args, **kwargs):
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            with self._lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profile)
+                else:
+                    self.stats.add(profile)
+
+    def stop(self, path):
+        with self._lock:
+            if self.stats is None:
+                logger.info("Profiler stopped before any handler ran; nothing written")
+                return
+            self.stats.dump_stats(path)
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def toggle_profiler():
+    """Start the profiler, or stop it and write results to PROFILE_OUTPUT"""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            # cProfile only sees the thread that enabled it, so it is applied per
+            # handler call; the sampling profiler covers every thread
+            profiler = SamplingProfiler() if PROFILER == "sampling" else HandlerProfiler()
+            profiler.start()
+            _profiler = profiler
+            logger.info(f"{PROFILER} profiler started")
+            return True
+
+        _profiler.stop(PROFILE_OUTPUT)
+        _profiler = None
+        logger.info(f"{PROFILER} profiler stopped, results written to {PROFILE_OUTPUT}")
+        return False
+
+def install_profiler_signal(signum=None):
+    """Toggle the profiler on SIGUSR1 (`kill -USR1 <pid>`)"""
+    signum = signum or getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return
+    signal.signal(signum, lambda *_: toggle_profiler())
+    if os.environ.get("PROFILE_ON_START", "").lower() in ("1", "true", "yes"):
+        toggle_profiler()
+
+class _TracedCallable:
+    """Wraps a Slack API method or `say` so each call is recorded as a span"""
+    def __init__(self, name, func):
+        self._name = name
+        self._func = func
+
+    def __call__(self, *args, **kwargs):
+        with span(self._name):
+            return self._func(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._func, attr)
+
+class TracedClient:
+    """Proxy for a Slack WebClient that records a span per API call"""
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, attr):
+        value = getattr(self._client, attr)
+        if callable(value) and not attr.startswith("_"):
+            return _TracedCallable(f"slack.{attr}", value)
+        return value
+
+def traced_client(client):
+    """Wrap a Slack client once so its API calls show up as spans"""
+    if client is None or isinstance(client, TracedClient):
+        return client
+    return TracedClient(client)
@@ -0,0 +1,150 @@
+import os
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+USAGE_LOG_PATH = os.environ.get("USAGE_LOG_PATH", os.path.join(DATA_DIR, "usage.jsonl"))
+
+# USD per 1M tokens: (input, cached input, output)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+DEFAULT_PRICES = MODEL_PRICES["gpt-4o-mini"]
+
+_lock = threading.Lock()
+
+def estimate_cost(model, prompt_tokens, cached_tokens, completion_tokens):
+    """Estimated USD cost of one completion call"""
+    input_price, cached_price, output_price = MODEL_PRICES.get(model, DEFAULT_PRICES)
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * input_price + cached_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+def record(response, model, latency, thread_ts=None, category=None, purpose="ticket"):
+    """Append the token usage of one completion call to the usage log"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    entry = {
+        "ts": time.time(),
+        "thread_ts": thread_ts,
+        "category": category or "Other",
+        "purpose": purpose,
+        "model": model,
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "latency_ms": round(latency * 1000, 1),
+    }
+    entry["cost"] = estimate_cost(model, entry["prompt_tokens"], cached_tokens, entry["completion_tokens"])
+
+    try:
+        with _lock:
+            os.makedirs(os.path.dirname(USAGE_LOG_PATH) or ".", exist_ok=True)
+            with open(USAGE_LOG_PATH, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        logger.error(f"Error recording token usage: {str(e)}")
+    return entry
+
+def load_entries(start_time, end_time):
+    """Read usage entries recorded between two datetimes"""
+    start_ts, end_ts = start_time.timestamp(), end_time.timestamp()
+    entries = []
+    try:
+        with open(USAGE_LOG_PATH) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if start_ts <= entry.get("ts", 0) <= end_ts:
+                    entries.append(entry)
+    except FileNotFoundError:
+        pass
+    return entries
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(entries):
+    """Aggregate usage per ticket, category and day for the report"""
+    tickets = defaultdict(lambda: {"calls": 0, "tokens": 0, "cost": 0.0, "category": "Other", "day": None})
+    categories = defaultdict(lambda: {"tickets": set(), "tokens": 0, "cost": 0.0})
+    days = defaultdict(lambda: {"calls": 0, "tokens": 0, "cost": 0.0})
+    totals = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+    latencies = []
+
+    for entry in entries:
+        tokens = entry["prompt_tokens"] + entry["completion_tokens"]
+        day = datetime.fromtimestamp(entry["ts"]).date().isoformat()
+        key = entry.get("thread_ts") or f"untracked:{entry['ts']}"
+
+        totals["calls"] += 1
+        for field in ("prompt_tokens", "cached_tokens", "completion_tokens", "cost"):
+            totals[field] += entry.get(field, 0)
+        latencies.append(entry.get("latency_ms", 0))
+
+        ticket = tickets[key]
+        ticket["calls"] += 1
+        ticket["tokens"] += tokens
+        ticket["cost"] += entry["cost"]
+        ticket["day"] = ticket["day"] or day
+        if entry.get("purpose") == "ticket":
+            ticket["category"] = entry.get("category", "Other")
+
+        category = categories[entry.get("category", "Other")]
+        category["tickets"].add(key)
+        category["tokens"] += tokens
+        category["cost"] += entry["cost"]
+
+        days[day]["calls"] += 1
+        days[day]["tokens"] += tokens
+        days[day]["cost"] += entry["cost"]
+
+    ticket_count = len(tickets)
+    avg_tokens = (sum(t["tokens"] for t in tickets.values()) / ticket_count) if ticket_count else 0
+    avg_cost = (totals["cost"] / ticket_count) if ticket_count else 0
+
+    # Outliers: tickets using more than twice the average tokens, most expensive first
+    outliers = sorted(
+        (t for t in tickets.values() if avg_tokens and t["tokens"] > 2 * avg_tokens),
+        key=lambda t: t["tokens"],
+        reverse=True
+    )[:5]
+
+    return {
+        "tickets": ticket_count,
+        "totals": totals,
+        "avg_tokens_per_ticket": avg_tokens,
+        "avg_cost_per_ticket": avg_cost,
+        "avg_calls_per_ticket": (totals["calls"] / ticket_count) if ticket_count else 0,
+        "cache_hit_rate": (totals["cached_tokens"] / totals["prompt_tokens"] * 100) if totals["prompt_tokens"] else 0,
+        "latency_p50_ms": _percentile(latencies, 50),
+        "latency_p95_ms": _percentile(latencies, 95),
+        "by_category": {
+            name: {
+                "tickets": len(data["tickets"]),
+                "tokens": data["tokens"],
+                "cost": data["cost"],
+                "avg_tokens": data["tokens"] / len(data["tickets"]) if data["tickets"] else 0,
+            }
+            for name, data in categories.items()
+        },
+        "by_day": dict(sorted(days.items())),
+        "outliers": outliers,
+    }